@@ -1,27 +1,63 @@
 import tkinter as tk
-from tkinter import simpledialog, messagebox
 import time
-from threading import Thread
+from threading import Thread, Event, Lock, current_thread
 from pystray import Icon, Menu, MenuItem
-from PIL import Image, ImageDraw
-import webbrowser
+from PIL import Image
 import os
 import sys
-import winreg
+try:
+    import winreg
+except ImportError:
+    winreg = None  # not on Windows
 import json
-import webview
-import ctypes
 import logging
 from datetime import datetime
-import urllib.request
-import urllib.error
-import subprocess
+from functools import lru_cache
+import shutil
+import queue
+import gzip
+import hashlib
+import heapq
+import itertools
+import random
+import math
+import io
+import base64
+import html
+from types import MappingProxyType
+
+from lazy_module import LazyModule
+from settings_store import (
+    default_log_settings, default_scheduler_settings, default_update_settings, default_tray_settings,
+    default_interval_minutes, default_message, PRESET_INTERVALS, LOG_SUBSYSTEMS, SETTINGS_SCHEMA_VERSION,
+    interval_label, parse_settings, read_settings_file, settings_file_lock, write_json_atomic,
+)
+from scheduling import Scheduler, ActiveTimeTracker, get_idle_detector, resume_first_delay
+from updater import (
+    UpdateCheckError, UpdateService, select_release_asset, get_asset_sha256, lower_thread_priority,
+    download_release_asset, make_delta, apply_delta,
+)
+
+# The startup timeline is measured from here
+process_start = time.perf_counter()
+
+webview = LazyModule('webview')
+ImageDraw = LazyModule('PIL.ImageDraw')
+urllib_request = LazyModule('urllib.request')
+simpledialog = LazyModule('tkinter.simpledialog')
+messagebox = LazyModule('tkinter.messagebox')
+subprocess = LazyModule('subprocess')
+ctypes = LazyModule('ctypes')
+webbrowser = LazyModule('webbrowser')
+tempfile = LazyModule('tempfile')
+LAZY_MODULES = ('webview', 'PIL.ImageDraw', 'urllib.request', 'urllib.error', 'tkinter.simpledialog',
+                'tkinter.messagebox', 'subprocess', 'ctypes', 'webbrowser', 'tempfile')
 
 # Version
 CURRENT_VERSION = "v1.0.2"
 GITHUB_RELEASES_URL = "https://github.com/bibekchandsah/eye-care/releases"
 GITHUB_NEW_RELEASES_URL = "https://github.com/bibekchandsah/eye-care/releases/latest"
-GITHUB_API_URL = "https://api.github.com/repos/bibekchandsah/eye-care/releases/latest"
+GITHUB_RELEASES_API_URL = "https://api.github.com/repos/bibekchandsah/eye-care/releases"
 
 # Setup paths
 def get_app_path():
@@ -37,139 +73,804 @@ def get_resource_path():
         return sys._MEIPASS
     return os.path.dirname(os.path.abspath(__file__))
 
-# Custom logging handler that writes recent logs at the top
-class PrependFileHandler(logging.FileHandler):
+# Separator line written at the start of every session
+LOG_SESSION_SEPARATOR = "="*50
+
+def load_log_index(log_file_path):
+    """Read the sidecar index (log file + .idx): {'created': timestamp, 'sessions': [offsets]}"""
+    try:
+        with open(log_file_path + ".idx", 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        offsets = index.get('sessions', [])
+        if isinstance(offsets, list) and all(isinstance(o, int) for o in offsets):
+            return index
+    except (OSError, ValueError, AttributeError):
+        pass
+    return None
+
+def read_log_index(log_file_path):
+    """Read the session offsets recorded in the sidecar index"""
+    index = load_log_index(log_file_path)
+    return index['sessions'] if index is not None else None
+
+def write_log_index(log_file_path, offsets, created=None):
+    """Replace the sidecar index with the given session offsets (keeps the segment creation time)"""
+    if created is None:
+        index = load_log_index(log_file_path)
+        created = index.get('created') if index else None
+    index_path = log_file_path + ".idx"
+    temp_path = index_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'created': created or time.time(), 'sessions': offsets}, f)
+    os.replace(temp_path, index_path)
+
+def get_log_archives(log_file_path):
+    """List rotated archives next to the log file, oldest first"""
+    log_dir = os.path.dirname(log_file_path)
+    prefix = os.path.splitext(os.path.basename(log_file_path))[0] + "-"
+    archives = []
+    try:
+        for name in os.listdir(log_dir):
+            if name.startswith(prefix) and name.endswith(('.log.gz', '.log.zst')):
+                archives.append(os.path.join(log_dir, name))
+    except OSError:
+        pass
+    # Archive names carry a sortable timestamp
+    return sorted(archives)
+
+def compress_log_segment(segment_path, compression):
+    """Compress a rotated segment next to itself and remove the uncompressed copy"""
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            compression = 'gzip'
+    if compression == 'zstd':
+        archive_path = segment_path + ".zst"
+        with open(segment_path, 'rb') as src, open(archive_path, 'wb') as dst:
+            zstandard.ZstdCompressor().copy_stream(src, dst)
+    else:
+        archive_path = segment_path + ".gz"
+        with open(segment_path, 'rb') as src, gzip.open(archive_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+    os.remove(segment_path)
+    return archive_path
+
+def enforce_log_archive_budget(log_file_path, budget_bytes):
+    """Delete the oldest archives until all of them fit in budget_bytes"""
+    archives = []
+    for path in get_log_archives(log_file_path):
+        try:
+            archives.append((path, os.path.getsize(path)))
+        except OSError:
+            pass
+    total = sum(size for _, size in archives)
+    for path, size in archives:
+        if total <= budget_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError as e:
+            print(f"Error removing log archive {path}: {e}")
+
+# Custom logging handler that appends records to the end of the log file
+class AppendFileHandler(logging.FileHandler):
+    """Append-only log writer: each record costs the same no matter how big the log is.
+
+    Records logged with extra={'session_start': True} have their byte offset
+    added to the sidecar index so startup trimming can cut at a known position.
+    """
+    def __init__(self, filename, encoding='utf-8', max_bytes=0, max_age_days=0,
+                 archive_budget_bytes=0, compression='gzip'):
+        super().__init__(filename, mode='a', encoding=encoding)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self.archive_budget_bytes = archive_budget_bytes
+        self.compression = compression
+        index = load_log_index(self.baseFilename)
+        self.created = index.get('created') if index and index.get('created') else time.time()
+
     def emit(self, record):
+        self.write_batch([record])
+
+    def should_rotate(self):
+        """Check the size and age limits of the current segment"""
+        if self.max_bytes and os.fstat(self.stream.fileno()).st_size >= self.max_bytes:
+            return True
+        if self.max_age_seconds and time.time() - self.created >= self.max_age_seconds:
+            return True
+        return False
+
+    def rotate(self):
+        """Move the current segment into a compressed archive and start a fresh log"""
+        self.stream.close()
+        self.stream = None
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        segment_path = f"{os.path.splitext(self.baseFilename)[0]}-{stamp}.log"
+        os.replace(self.baseFilename, segment_path)
+        self.created = time.time()
+        write_log_index(self.baseFilename, [], created=self.created)
+        self.stream = self._open()
         try:
-            msg = self.format(record)
+            compress_log_segment(segment_path, self.compression)
+            if self.archive_budget_bytes:
+                enforce_log_archive_budget(self.baseFilename, self.archive_budget_bytes)
+        except Exception as e:
+            print(f"Error archiving log segment: {e}")
+
+    def write_batch(self, records):
+        """Write several records with a single flush at the end"""
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            if self.should_rotate():
+                self.rotate()
+        except Exception as e:
+            print(f"Error rotating log file: {e}")
+            if self.stream is None:
+                self.stream = self._open()
+        for record in records:
+            try:
+                if getattr(record, 'session_start', False):
+                    self.stream.flush()
+                    offset = os.fstat(self.stream.fileno()).st_size
+                    offsets = read_log_index(self.baseFilename) or []
+                    write_log_index(self.baseFilename, offsets + [offset], created=self.created)
+                self.stream.write(self.format(record) + self.terminator)
+            except Exception:
+                self.handleError(record)
+        self.stream.flush()
+
+    def sync(self):
+        """Flush buffered data and fsync it to disk"""
+        if self.stream is not None:
+            self.stream.flush()
+            os.fsync(self.stream.fileno())
+
+    def trim(self, keep_sessions):
+        """Trim the log to its last keep_sessions sessions; the file is reopened on the next write"""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        trim_log_file(self.baseFilename, keep_sessions)
+
+# Marker that tells the log writer thread to stop
+_LOG_WRITER_STOP = object()
+
+class _LogWriterTask:
+    """A function for the log writer thread to run between batches, with a way to wait for it"""
+    def __init__(self, fn):
+        self.fn = fn
+        self.done = Event()
+
+class AsyncLogHandler(logging.Handler):
+    """Queue records in memory and let one background thread write them in batches.
+
+    emit() only appends to a queue, so the Tk loop, the tray thread and the
+    update checker never wait on disk. The writer drains whatever has queued
+    up, writes it with one flush, and fsyncs every fsync_interval seconds.
+    """
+    def __init__(self, target, fsync_interval=default_log_settings['log_fsync_interval'], max_batch=256):
+        super().__init__()
+        self.target = target
+        self.fsync_interval = fsync_interval
+        self.max_batch = max_batch
+        self.queue = queue.SimpleQueue()
+        self.closed = False
+        self.thread = Thread(target=self._writer_loop, name="EyeCareLogWriter", daemon=True)
+        self.thread.start()
+
+    def emit(self, record):
+        self.queue.put(record)
+
+    def _writer_loop(self):
+        last_sync = time.monotonic()
+        dirty = False
+        while True:
+            # Block until there is work; wake up early if an fsync is due
+            try:
+                if dirty:
+                    item = self.queue.get(timeout=max(0.0, last_sync + self.fsync_interval - time.monotonic()))
+                else:
+                    item = self.queue.get()
+            except queue.Empty:
+                item = None
             
-            # Read existing content
-            existing_content = ""
-            if os.path.exists(self.baseFilename):
+            batch = [] if item is None else [item]
+            while len(batch) < self.max_batch:
                 try:
-                    with open(self.baseFilename, 'r', encoding='utf-8') as f:
-                        existing_content = f.read()
-                except:
-                    pass
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            waiters = [i for i in batch if isinstance(i, Event)]
+            stop = _LOG_WRITER_STOP in batch
             
-            # Write new log at the top
-            with open(self.baseFilename, 'w', encoding='utf-8') as f:
-                f.write(msg + '\n')
-                if existing_content:
-                    f.write(existing_content)
-        except Exception:
-            self.handleError(record)
+            try:
+                # Records queued before a task are written before it runs
+                records = []
+                for i in batch:
+                    if isinstance(i, logging.LogRecord):
+                        records.append(i)
+                    elif isinstance(i, _LogWriterTask):
+                        if records:
+                            self.target.write_batch(records)
+                            records = []
+                            dirty = True
+                        try:
+                            i.fn()
+                        finally:
+                            i.done.set()
+                if records:
+                    self.target.write_batch(records)
+                    dirty = True
+                if dirty and (waiters or stop or time.monotonic() - last_sync >= self.fsync_interval):
+                    self.target.sync()
+                    last_sync = time.monotonic()
+                    dirty = False
+            except Exception as e:
+                print(f"Error writing log: {e}")
+            
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def run_on_writer(self, fn, timeout=None):
+        """Run fn on the writer thread, where it can't race a write; returns False if it didn't finish in time"""
+        if self.closed or not self.thread.is_alive():
+            return False
+        task = _LogWriterTask(fn)
+        self.queue.put(task)
+        return task.done.wait(timeout)
+
+    def flush(self, timeout=5.0):
+        """Wait until everything queued so far is written and fsynced"""
+        if self.closed or not self.thread.is_alive():
+            return
+        done = Event()
+        self.queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Write out pending records, stop the writer thread and close the file"""
+        if not self.closed:
+            self.closed = True
+            if self.thread.is_alive():
+                self.queue.put(_LOG_WRITER_STOP)
+                self.thread.join(timeout)
+            self.target.close()
+        super().close()
+
+def iter_log_lines_reversed(log_file_path, chunk_size=64 * 1024):
+    """Yield (byte_offset, line) pairs from the end of the log backwards, reading fixed-size chunks"""
+    try:
+        with open(log_file_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            buffer = b''
+            while position > 0:
+                read_size = min(chunk_size, position)
+                position -= read_size
+                f.seek(position)
+                buffer = f.read(read_size) + buffer
+                lines = buffer.split(b'\n')
+                # The first piece may be the tail of a line that starts in an earlier chunk
+                buffer = lines.pop(0)
+                offset = position + len(buffer) + 1
+                entries = []
+                for line in lines:
+                    entries.append((offset, line))
+                    offset += len(line) + 1
+                for offset, line in reversed(entries):
+                    if line.strip():
+                        yield offset, line.decode('utf-8', errors='replace').rstrip('\r')
+            if buffer.strip():
+                yield 0, buffer.decode('utf-8', errors='replace').rstrip('\r')
+    except FileNotFoundError:
+        return
+
+def read_log_newest_first(log_file_path, max_lines=None):
+    """Return log lines newest first without loading the whole file"""
+    lines = []
+    for _, line in iter_log_lines_reversed(log_file_path):
+        lines.append(line)
+        if max_lines is not None and len(lines) >= max_lines:
+            break
+    return lines
 
-def trim_log_file(log_file_path):
-    """Trim log file to keep only most recent session (between first two separator lines)"""
+def find_session_offsets(log_file_path, keep_sessions):
+    """Find the offsets of the last keep_sessions sessions by scanning backwards (index fallback)"""
+    offsets = []
+    if keep_sessions <= 0:
+        return offsets
+    for offset, line in iter_log_lines_reversed(log_file_path):
+        if LOG_SESSION_SEPARATOR in line:
+            offsets.insert(0, offset)
+            if len(offsets) >= keep_sessions:
+                break
+    return offsets
+
+def is_session_offset(log_file_path, offset, file_size):
+    """Check that a recorded offset still points at a session separator line"""
+    if offset < 0 or offset >= file_size:
+        return False
+    with open(log_file_path, 'rb') as f:
+        f.seek(offset)
+        line = f.readline(4096)
+    return LOG_SESSION_SEPARATOR.encode() in line
+
+def trim_log_file(log_file_path, keep_sessions=default_log_settings['log_keep_sessions']):
+    """Trim log file to keep only the last keep_sessions sessions, using the sidecar offset index"""
     try:
         if not os.path.exists(log_file_path):
             return
         
-        with open(log_file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        # Find the second occurrence of the separator
-        separator = "="*50
-        separator_count = 0
-        trim_index = -1
+        keep_sessions = max(0, keep_sessions)
+        if keep_sessions == 0:
+            # Nothing to keep
+            with open(log_file_path, 'wb'):
+                pass
+            write_log_index(log_file_path, [])
+            return
         
-        for i, line in enumerate(lines):
-            if separator in line:
-                separator_count += 1
-                if separator_count == 3:  # second occurrence
-                    trim_index = i
-                    break
+        # Trust the index only if the offset we would cut at still points at a separator
+        file_size = os.path.getsize(log_file_path)
+        offsets = read_log_index(log_file_path)
+        rebuilt = False
+        if (offsets is None or offsets != sorted(offsets)
+                or (offsets and not is_session_offset(log_file_path, offsets[-min(keep_sessions, len(offsets))], file_size))):
+            offsets = find_session_offsets(log_file_path, keep_sessions)
+            rebuilt = True
         
-        # If second separator found, keep only lines before it
-        if trim_index > 0:
-            with open(log_file_path, 'w', encoding='utf-8') as f:
-                f.writelines(lines[:trim_index])
+        kept = offsets[-keep_sessions:]
+        if kept and kept[0] > 0:
+            # Copy the kept sessions over the old file, starting at a known offset
+            cut = kept[0]
+            temp_path = log_file_path + ".tmp"
+            with open(log_file_path, 'rb') as src, open(temp_path, 'wb') as dst:
+                src.seek(cut)
+                shutil.copyfileobj(src, dst)
+            os.replace(temp_path, log_file_path)
+            write_log_index(log_file_path, [o - cut for o in kept])
+        elif rebuilt:
+            write_log_index(log_file_path, kept)
     except Exception as e:
         print(f"Error trimming log file: {e}")
 
+# Attributes every LogRecord has, plus the rate_limit flag for RateLimitFilter;
+# anything else was passed through extra= and goes into the JSON
+_STANDARD_RECORD_FIELDS = set(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime', 'rate_limit'}
+
+class JsonLineFormatter(logging.Formatter):
+    """Format each record as one JSON object per line"""
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class RateLimitFilter(logging.Filter):
+    """Let through at most `burst` copies of the same message per `window` seconds.
+
+    Only records logged with extra={'rate_limit': True} are limited: the few
+    messages known to repeat on a timer or on every click, such as
+    "Timer is paused, skipping reminder". They are keyed on the logger name
+    and the unformatted message, and the next record that gets through
+    carries a `suppressed` count. Warnings and errors are never dropped.
+    """
+    def __init__(self, burst=3, window=300.0, max_keys=1024, exempt_level=logging.WARNING):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.max_keys = max_keys
+        self.exempt_level = exempt_level
+        self.counters = {}
+        self.lock = Lock()
+
+    def filter(self, record):
+        if self.burst <= 0 or record.levelno >= self.exempt_level or not getattr(record, 'rate_limit', False):
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self.lock:
+            window_start, count, suppressed = self.counters.get(key, (now, 0, 0))
+            if now - window_start >= self.window:
+                window_start, count = now, 0
+            if count >= self.burst:
+                self.counters[key] = (window_start, count, suppressed + 1)
+                return False
+            if suppressed:
+                record.suppressed = suppressed
+            if len(self.counters) >= self.max_keys and key not in self.counters:
+                self.counters.clear()
+            self.counters[key] = (window_start, count + 1, 0)
+        return True
+
+def parse_log_level(name, default=logging.DEBUG):
+    """Turn a level name from settings.json ('INFO', 'debug', ...) into a logging level"""
+    level = logging.getLevelName(str(name).upper())
+    return level if isinstance(level, int) else default
+
+# Settings file path
+settings_file = os.path.join(get_app_path(), "settings.json")
+
+# Release tooling, benchmarks and checks that run and exit without starting the app
+TOOL_COMMANDS = ('--make-delta', '--apply-delta', '--bench-menu', '--bench-log', '--bench-delta',
+                 '--bench-reminder', '--check-import-budget', '--import-only')
+running_tool = len(sys.argv) > 1 and sys.argv[1] in TOOL_COMMANDS
+
 # Setup logging
 log_file = os.path.join(get_app_path(), "eyecare.log")
-
-# Trim log file to keep only recent session
-trim_log_file(log_file)
+startup_settings, _, _ = parse_settings(read_settings_file(settings_file))
+log_settings = {key: startup_settings[key] for key in default_log_settings}
 
 logger = logging.getLogger('EyeCare')
-logger.setLevel(logging.DEBUG)
+logger.setLevel(parse_log_level(log_settings['log_level']))
 
-# Create handler and formatter
-handler = PrependFileHandler(log_file, encoding='utf-8')
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-handler.setFormatter(formatter)
+# Per-subsystem loggers; they inherit the EyeCare level unless log_levels overrides it
+scheduler_logger = logging.getLogger('EyeCare.scheduler')
+renderer_logger = logging.getLogger('EyeCare.renderer')
+updater_logger = logging.getLogger('EyeCare.updater')
+tray_logger = logging.getLogger('EyeCare.tray')
+settings_logger = logging.getLogger('EyeCare.settings')
+
+def apply_log_levels():
+    """Apply log_level and the per-subsystem log_levels from log_settings"""
+    logger.setLevel(parse_log_level(log_settings['log_level']))
+    overrides = log_settings['log_levels'] if isinstance(log_settings['log_levels'], dict) else {}
+    for name in LOG_SUBSYSTEMS:
+        level = overrides.get(name)
+        logging.getLogger(f'EyeCare.{name}').setLevel(parse_log_level(level, logging.NOTSET) if level else logging.NOTSET)
+
+apply_log_levels()
+
+def make_log_formatter(log_format):
+    """Formatter for the log_format setting: 'text' or JSON lines"""
+    if log_format == 'text':
+        return logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+    return JsonLineFormatter()
+
+if running_tool:
+    # Tools print their own results and must not touch the app's log;
+    # only warnings and errors are shown, on stderr
+    file_handler = None
+    handler = logging.StreamHandler()
+    handler.setLevel(logging.WARNING)
+else:
+    # Create handler and formatter; records are written by a background thread,
+    # which also rotates eyecare.log into compressed archives by size and age
+    file_handler = AppendFileHandler(
+        log_file,
+        encoding='utf-8',
+        max_bytes=log_settings['log_max_bytes'],
+        max_age_days=log_settings['log_max_age_days'],
+        archive_budget_bytes=log_settings['log_archive_budget_bytes'],
+        compression=log_settings['log_compression']
+    )
+    file_handler.setFormatter(make_log_formatter(log_settings['log_format']))
+    # Formatting happens on the writer thread; callers only pay for the level check and the queue put
+    handler = AsyncLogHandler(file_handler, fsync_interval=log_settings['log_fsync_interval'])
+rate_limit_filter = RateLimitFilter(log_settings['log_rate_limit_burst'], log_settings['log_rate_limit_window'])
+handler.addFilter(rate_limit_filter)
 logger.addHandler(handler)
 
+def apply_log_settings():
+    """Apply log_settings to the loggers, the log writer and the rate limiter.
+
+    Used when settings.json is reloaded. Each value is a single attribute the
+    writer thread reads per batch, so no locking is needed; log_keep_sessions
+    is read when the log is trimmed at startup.
+    """
+    apply_log_levels()
+    file_handler.max_bytes = log_settings['log_max_bytes']
+    file_handler.max_age_seconds = log_settings['log_max_age_days'] * 24 * 60 * 60
+    file_handler.archive_budget_bytes = log_settings['log_archive_budget_bytes']
+    file_handler.compression = log_settings['log_compression']
+    file_handler.setFormatter(make_log_formatter(log_settings['log_format']))
+    handler.fsync_interval = log_settings['log_fsync_interval']
+    rate_limit_filter.burst = log_settings['log_rate_limit_burst']
+    rate_limit_filter.window = log_settings['log_rate_limit_window']
+
+def flush_logs():
+    """Make sure every queued log record is on disk"""
+    handler.flush()
+
+def shutdown_logging():
+    """Flush and stop the background log writer"""
+    handler.close()
+
+def trim_logs():
+    """Keep log_keep_sessions previous sessions plus the current one; runs on the log writer thread"""
+    keep_sessions = log_settings['log_keep_sessions'] + 1
+    if not handler.run_on_writer(lambda: file_handler.trim(keep_sessions), timeout=30):
+        logger.warning("Log trimming did not finish")
+
+LOG_BENCH_SIZES = (1024, 1024 * 1024, 10 * 1024 * 1024, 50 * 1024 * 1024)
+
+def benchmark_log_append(sizes=LOG_BENCH_SIZES, records=2000):
+    """`--bench-log`: time appending records to logs of 1 KB up to 50 MB; the cost should not grow with the file"""
+    record = logging.LogRecord('EyeCare.renderer', logging.INFO, __file__, 0,
+                               "Reminder visible after %.0f ms (peak RSS %s MB)", (42.0, '61.3'), None)
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = os.path.join(directory, f"bench-{size}.log")
+            bench_handler = AppendFileHandler(path)
+            bench_handler.setFormatter(make_log_formatter(log_settings['log_format']))
+            line = (bench_handler.format(record) + bench_handler.terminator).encode('utf-8')
+            with open(path, 'wb') as f:
+                for _ in range(0, size, 1024 * 1024):
+                    f.write(line * max(1, min(size, 1024 * 1024) // len(line)))
+            size = os.path.getsize(path)
+            # One flush per record, as emit() does
+            started = time.perf_counter()
+            for _ in range(records):
+                bench_handler.emit(record)
+            single = (time.perf_counter() - started) / records
+            # Batches of 256, as the async writer does under load
+            started = time.perf_counter()
+            for _ in range(0, records, 256):
+                bench_handler.write_batch([record] * 256)
+            batched = (time.perf_counter() - started) / (-(-records // 256) * 256)
+            bench_handler.close()
+            started = time.perf_counter()
+            newest = list(itertools.islice(iter_log_lines_reversed(path), 200))
+            read_ms = (time.perf_counter() - started) * 1000
+            print(f"{size / 1024:>10.0f} KB log: {single * 1e6:6.1f} us per record, "
+                  f"{batched * 1e6:6.1f} us batched, newest {len(newest)} lines read in {read_ms:.2f} ms")
+    return 0
+
 # Log startup
-logger.info("="*50)
-logger.info(f"EyeCare Application Starting")
-logger.info(f"App Path: {get_app_path()}")
-logger.info(f"Resource Path: {get_resource_path()}")
-logger.info(f"Python: {sys.version}")
-logger.info(f"Frozen: {getattr(sys, 'frozen', False)}")
+logger.info(LOG_SESSION_SEPARATOR, extra={'session_start': True})
+logger.info("EyeCare Application Starting")
+logger.info("App Path: %s", get_app_path())
+logger.info("Resource Path: %s", get_resource_path())
+logger.info("Python: %s", sys.version)
+logger.info("Frozen: %s", getattr(sys, 'frozen', False))
 
 # Global variables
-# default_interval_minutes = 20
-default_interval_minutes = 1
-default_message = "Have a look far away from your current screen to protect your beautiful eyes"
-
 interval_minutes = default_interval_minutes
-# selected_interval = "20 minutes"
-selected_interval = "1 minute"
+selected_interval = interval_label(default_interval_minutes)
 is_paused = False
 auto_start_enabled = False
+adopt_os_auto_start = False  # no settings file at startup, so the OS auto start state wins
+auto_start_reconciled = False  # until then the saved setting, not the OS entry, is authoritative
 reminder_message = default_message
-timer_id = None  # Track the scheduled timer
+scheduler_settings = dict(default_scheduler_settings)
+update_settings = dict(default_update_settings)
+tray_settings = dict(default_tray_settings)
 # update_notification_shown = False  # Track if update notification was already shown this session
 
-# Settings file path
-settings_file = os.path.join(get_app_path(), "settings.json")
-logger.info(f"Settings file: {settings_file}")
+logger.info("Settings file: %s", settings_file)
+
+# Content hash and stat signature of settings.json as last read or written by us
+settings_file_hash = None
+settings_file_signature = None
+settings_watch_job = None
+# How often the watcher checks settings.json for outside changes
+SETTINGS_WATCH_INTERVAL = 0.5
+
+def get_settings_signature():
+    """Cheap change check: (mtime, size) of settings.json, or None if it doesn't exist"""
+    try:
+        st = os.stat(settings_file)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def apply_settings(settings, reconcile=True):
+    """Apply validated settings (see parse_settings) to the running app.
+
+    With reconcile=False the OS auto start entry is left alone; at startup
+    that is done later, off the critical path, by reconcile_auto_start().
+    """
+    global interval_minutes, selected_interval, reminder_message, auto_start_enabled
+    interval_minutes = settings['interval_minutes']
+    selected_interval = settings['selected_interval']
+    reminder_message = settings['reminder_message']
+    # Apply auto start setting from JSON
+    auto_start_enabled = settings['auto_start']
+    if reconcile:
+        reconcile_auto_start()
+    # Log settings
+    for key in default_log_settings:
+        log_settings[key] = settings[key]
+    apply_log_settings()
+    # Scheduler settings
+    for key in default_scheduler_settings:
+        scheduler_settings[key] = settings[key]
+    scheduler.suspend_threshold = scheduler_settings['suspend_threshold_seconds']
+    # Update settings
+    for key in default_update_settings:
+        update_settings[key] = settings[key]
+    # Tray settings
+    for key in default_tray_settings:
+        tray_settings[key] = settings[key]
+    refresh_menu_state()
 
 def load_settings():
-    global interval_minutes, selected_interval, reminder_message
-    logger.info("Loading settings...")
+    global adopt_os_auto_start, settings_file_hash, settings_file_signature
+    settings_logger.info("Loading settings...")
     try:
+        settings_file_signature = get_settings_signature()
         if os.path.exists(settings_file):
-            with open(settings_file, 'r') as f:
-                settings = json.load(f)
-                interval_minutes = settings.get('interval_minutes', default_interval_minutes)
-                selected_interval = settings.get('selected_interval', '20 minutes')
-                reminder_message = settings.get('reminder_message', default_message)
-                # If reminder message is empty, use default
-                if not reminder_message or reminder_message.strip() == '':
-                    reminder_message = default_message
-                # Apply auto start setting from JSON
-                auto_start_saved = settings.get('auto_start', False)
-                if auto_start_saved and not is_auto_start_enabled():
-                    enable_auto_start()
-                elif not auto_start_saved and is_auto_start_enabled():
-                    disable_auto_start()
-            logger.info(f"Settings loaded: interval={interval_minutes}, selected={selected_interval}")
+            with open(settings_file, 'rb') as f:
+                content = f.read()
+            settings_file_hash = hashlib.sha256(content).hexdigest()
+            try:
+                raw = json.loads(content)
+            except ValueError as e:
+                settings_logger.error("settings.json is not valid JSON, using defaults: %s", e)
+                raw = {}
+            settings, needs_write_back, repaired = parse_settings(raw)
+            if repaired:
+                settings_logger.warning("Repaired invalid settings: %s", ", ".join(repaired))
+            check_settings_version(settings)
+            apply_settings(settings, reconcile=False)
+            settings_logger.info("Settings loaded: interval=%s, selected=%s", interval_minutes, selected_interval)
+            if needs_write_back:
+                # Store the upgraded/repaired file once so this doesn't happen on every start
+                save_settings()
         else:
-            logger.warning(f"Settings file not found: {settings_file}")
+            # Nothing saved yet: take whatever auto start state the OS has
+            adopt_os_auto_start = True
+            settings_logger.warning("Settings file not found: %s", settings_file)
     except Exception as e:
-        logger.error(f"Error loading settings: {e}")
+        settings_logger.error("Error loading settings: %s", e)
         print(f"Error loading settings: {e}")
 
-def save_settings():
-    logger.info("Saving settings...")
+def check_settings_version(settings):
+    """Stop saving over a settings.json written by a newer EyeCare"""
+    global settings_file_newer
+    settings_file_newer = settings['schema_version'] > SETTINGS_SCHEMA_VERSION
+    if settings_file_newer:
+        settings_logger.warning("settings.json has schema version %s, newer than this version's %s; "
+                                "changes made here will not be saved", settings['schema_version'], SETTINGS_SCHEMA_VERSION)
+
+def reload_settings(settings):
+    """Apply settings.json changed on disk to the running app (runs on the Tk thread)"""
+    previous_schedule = (interval_minutes, scheduler_settings['schedule_mode'], scheduler_settings['idle_sample_seconds'])
     try:
-        settings = {
-            'interval_minutes': interval_minutes,
-            'selected_interval': selected_interval,
-            'reminder_message': reminder_message,
-            'auto_start': is_auto_start_enabled()
-        }
-        with open(settings_file, 'w') as f:
-            json.dump(settings, f, indent=4)
-        logger.info("Settings saved successfully")
+        apply_settings(settings)
+        settings_logger.info("Settings reloaded: interval=%s, selected=%s", interval_minutes, selected_interval)
+        if (interval_minutes, scheduler_settings['schedule_mode'], scheduler_settings['idle_sample_seconds']) != previous_schedule:
+            reschedule_timer()
     except Exception as e:
-        logger.error(f"Error saving settings: {e}")
-        print(f"Error saving settings: {e}")
+        settings_logger.error("Error applying reloaded settings: %s", e)
+
+def check_settings_file():
+    """Reload settings.json if it changed; the file is only parsed when its content hash changed"""
+    global settings_file_hash, settings_file_signature
+    signature = get_settings_signature()
+    if signature == settings_file_signature:
+        return
+    settings_file_signature = signature
+    if signature is None:
+        return
+    try:
+        with open(settings_file, 'rb') as f:
+            content = f.read()
+    except OSError:
+        return
+    content_hash = hashlib.sha256(content).hexdigest()
+    if content_hash == settings_file_hash:
+        return
+    try:
+        raw = json.loads(content)
+    except ValueError as e:
+        # Probably caught mid-edit; try again on the next change
+        settings_logger.warning("Ignoring unreadable settings.json: %s", e)
+        return
+    settings_file_hash = content_hash
+    settings, _, repaired = parse_settings(raw)
+    if repaired:
+        settings_logger.warning("Repaired invalid settings: %s", ", ".join(repaired))
+    check_settings_version(settings)
+    root.after(0, lambda: reload_settings(settings))
+
+def watch_settings_tick():
+    worker_pool.submit(check_settings_file, key='settings-check')
+    worker_pool.submit(check_auto_start, key='auto-start-check')
+
+def start_settings_watcher():
+    """Poll settings.json and the auto start entry for outside edits; the scheduler ticks and a worker does the stat"""
+    global settings_watch_job
+    settings_watch_job = scheduler.call_every(SETTINGS_WATCH_INTERVAL, watch_settings_tick)
+
+def stop_settings_watcher():
+    if settings_watch_job is not None:
+        settings_watch_job.cancel()
+
+# Seconds to wait for more changes before settings.json is written
+SETTINGS_SAVE_DELAY = 0.5
+# Seconds to wait before trying again when settings.json could not be written
+SETTINGS_RETRY_DELAY = 5.0
+settings_save_lock = Lock()
+settings_write_lock = Lock()  # held for the whole write, so flushes happen one at a time
+settings_save_timer = None  # Pending debounced write (ScheduledEvent)
+settings_dirty = False
+settings_file_newer = False  # settings.json is from a newer version; never overwrite it
+
+def collect_settings():
+    """Current settings as they are written to settings.json"""
+    return {
+        'schema_version': SETTINGS_SCHEMA_VERSION,
+        'interval_minutes': interval_minutes,
+        'selected_interval': selected_interval,
+        'reminder_message': reminder_message,
+        'auto_start': auto_start_enabled,
+        **log_settings,
+        **scheduler_settings,
+        **update_settings,
+        **tray_settings
+    }
+
+def schedule_settings_flush(delay):
+    """(Re)start the timer for the debounced write; call with settings_save_lock held"""
+    global settings_save_timer
+    if settings_save_timer is not None:
+        settings_save_timer.cancel()
+    settings_save_timer = scheduler.call_later(
+        delay,
+        lambda: worker_pool.submit(flush_settings, key='settings-flush')
+    )
+
+def save_settings():
+    """Schedule a write of settings.json; a burst of changes is written once, after SETTINGS_SAVE_DELAY"""
+    global settings_dirty
+    with settings_save_lock:
+        settings_dirty = True
+        schedule_settings_flush(SETTINGS_SAVE_DELAY)
+    # Every change the menu shows is saved, so this is where the menu catches up
+    refresh_menu_state()
+
+def flush_settings():
+    """Write pending settings changes to disk right away.
+
+    settings_save_lock is only held to take the snapshot, so save_settings()
+    never waits on the file lock; settings_write_lock keeps two flushes from
+    writing an older snapshot over a newer one. A failed write marks the
+    settings dirty again and retries after SETTINGS_RETRY_DELAY.
+    """
+    global settings_save_timer, settings_dirty, settings_file_hash
+    with settings_write_lock:
+        with settings_save_lock:
+            if settings_save_timer is not None:
+                settings_save_timer.cancel()
+                settings_save_timer = None
+            if not settings_dirty:
+                return
+            settings_dirty = False
+            if settings_file_newer:
+                settings_logger.warning("Not saving settings over a settings.json from a newer version")
+                return
+            settings = collect_settings()
+        settings_logger.info("Saving settings...")
+        try:
+            with settings_file_lock(settings_file):
+                # Remember our own content so the watcher doesn't reload it
+                settings_file_hash = write_json_atomic(settings_file, settings)
+            settings_logger.info("Settings saved successfully")
+        except Exception as e:
+            settings_logger.error("Error saving settings, retrying in %s seconds: %s", SETTINGS_RETRY_DELAY, e)
+            print(f"Error saving settings: {e}")
+            with settings_save_lock:
+                settings_dirty = True
+                # A newer change may already have a write scheduled sooner
+                if settings_save_timer is None:
+                    schedule_settings_flush(SETTINGS_RETRY_DELAY)
 
 def center_window(window, width, height):
     screen_width = window.winfo_screenwidth()
@@ -178,194 +879,793 @@ def center_window(window, width, height):
     y = (screen_height - height) // 2
     window.geometry(f"{width}x{height}+{x}+{y}")
 
-def show_message():
-    logger.info("show_message() called")
-    if is_paused:
-        logger.info("Timer is paused, skipping reminder")
-        return
-    
-    def show_html_window():
-        global timer_id
-        logger.info("show_html_window() starting")
-        # Create a temporary HTML file with the custom message and countdown
-        html_path = os.path.join(get_resource_path(), "index.html")
-        logger.info(f"HTML path: {html_path}")
-        
-        # Read the original HTML file
+# Icon assets
+class IconAssets:
+    """The app icon, decoded once and shared by the tray and every Tk window.
+
+    All frames of the .ico are decoded on first use. image(size) returns
+    the closest frame at that size (scaled down from the next larger frame
+    when there is no exact one) and keeps it. Tk windows share one set of
+    PhotoImages per screen DPI instead of each re-reading the file through
+    iconbitmap.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = Lock()
+        self.frames = None   # width -> RGBA image, as stored in the .ico
+        self.digest = None   # sha256 of the icon file, keys caches derived from it
+        self.scaled = {}
+        self.photos = {}
+
+    def load(self):
+        with self.lock:
+            if self.frames is not None:
+                return
+            try:
+                with open(self.path, 'rb') as f:
+                    data = f.read()
+                icon = Image.open(io.BytesIO(data))
+                sizes = sorted(icon.info.get('sizes') or [icon.size])
+                if hasattr(icon, 'ico'):
+                    self.frames = {size[0]: icon.ico.getimage(size).convert('RGBA') for size in sizes}
+                else:
+                    self.frames = {icon.size[0]: icon.convert('RGBA')}
+                self.digest = hashlib.sha256(data).hexdigest()
+                tray_logger.info("Icon loaded from file (%s)", ", ".join(f"{w}px" for w in self.frames))
+            except OSError as e:
+                tray_logger.warning("Icon file not usable (%s), using generated image", e)
+                fallback = create_image().convert('RGBA')
+                self.frames = {fallback.width: fallback}
+                self.digest = hashlib.sha256(b'generated').hexdigest()
+
+    def image(self, size):
+        """Icon at size x size pixels"""
+        self.load()
+        with self.lock:
+            if size not in self.scaled:
+                larger = [width for width in self.frames if width >= size]
+                source = self.frames[min(larger) if larger else max(self.frames)]
+                self.scaled[size] = source if source.width == size else source.resize((size, size), Image.LANCZOS)
+            return self.scaled[size]
+
+    def apply_to_window(self, window):
+        """Set window's icon from PhotoImages shared by every window on a screen with the same DPI; Tk thread only"""
+        dpi = round(window.winfo_fpixels('1i'))
+        photos = self.photos.get(dpi)
+        if photos is None:
+            photos = []
+            for base_size in (16, 32, 48):
+                buffer = io.BytesIO()
+                self.image(round(base_size * dpi / 96)).save(buffer, format='PNG')
+                photos.append(tk.PhotoImage(master=window, data=base64.b64encode(buffer.getvalue())))
+            self.photos[dpi] = photos
+        window.iconphoto(False, *photos)
+
+icon_assets = IconAssets(os.path.join(get_resource_path(), "eyecare.ico"))
+
+# Background work
+class WorkerPool:
+    """Small supervised executor that owns the app's background work.
+
+    Short jobs (update checks, settings writes, file polling) go through a
+    bounded queue served by a fixed number of worker threads. A job submitted
+    with a key is dropped while another job with the same key is queued or
+    running, so ten clicks on "Check for Update" make one request.
+    Long-running loops (the tray icon) run as services on their own thread;
+    a service that crashes is logged and, if asked for, restarted.
+    shutdown() stops everything within a bounded time.
+    """
+    def __init__(self, workers=2, max_queue=32, name="EyeCareWorker"):
+        self.name = name
+        self.queue = queue.Queue(max_queue)
+        self.lock = Lock()
+        self.in_flight = set()
+        self.stopping = Event()
+        self.threads = []
+        for i in range(workers):
+            thread = Thread(target=self._worker_loop, name=f"{name}-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, fn, key=None):
+        """Queue fn; returns False if it was dropped (duplicate key, full queue or shutting down)"""
+        if self.stopping.is_set():
+            return False
+        with self.lock:
+            if key is not None:
+                if key in self.in_flight:
+                    logger.debug("Job %s already pending, not queued again", key, extra={'rate_limit': True})
+                    return False
+                self.in_flight.add(key)
         try:
-            if not os.path.exists(html_path):
-                logger.error(f"index.html not found at: {html_path}")
-                root.after(interval_minutes * 60 * 1000, show_message)
+            self.queue.put_nowait((fn, key))
+            return True
+        except queue.Full:
+            logger.warning("Background queue full, dropping job %s", key or getattr(fn, '__name__', fn))
+            self._done(key)
+            return False
+
+    def _done(self, key):
+        if key is not None:
+            with self.lock:
+                self.in_flight.discard(key)
+
+    def _worker_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
                 return
-                
-            with open(html_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            logger.info("HTML file read successfully")
-            
-            # Replace the message placeholder with the custom message
-            html_content = html_content.replace(
-                '{{REMINDER_MESSAGE}}',
-                reminder_message
-            )
-            
-            # Create a temporary file with modified content
-            temp_html_path = os.path.join(get_app_path(), "temp_reminder.html")
-            with open(temp_html_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            logger.info(f"Temp HTML created: {temp_html_path}")
-            
-            # JavaScript API for closing the window
-            class Api:
-                def close_window(self):
-                    logger.info("close_window API called")
-                    try:
-                        for window in webview.windows:
-                            window.destroy()
-                    except Exception as e:
-                        logger.error(f"Error in close_window: {e}")
-            
-            api = Api()
-            
-            # Create and show webview window in fullscreen
-            logger.info("Creating webview window...")
-            window = webview.create_window(
-                'Eye Care Reminder',
-                temp_html_path,
-                fullscreen=True,
-                frameless=True,
-                on_top=True,
-                js_api=api
-            )
-            logger.info("Webview window created")
-            
-            # Function to bring window to front using Windows API
-            def bring_to_front():
-                time.sleep(0.5)
-                try:
-                    if webview.windows:
-                        webview.windows[0].on_top = True
-                        # Use Windows API to force foreground
-                        user32 = ctypes.windll.user32
-                        hwnd = user32.GetForegroundWindow()
-                        # Get all windows and find ours
-                        user32.keybd_event(0, 0, 0, 0)  # Simulate key press to allow SetForegroundWindow
-                        time.sleep(0.1)
-                        webview.windows[0].on_top = True
-                        logger.info("Window brought to front")
-                except Exception as e:
-                    logger.error(f"Error bringing window to front: {e}")
-            
-            # Auto-close after 20 seconds
-            def auto_close():
-                logger.info("Auto-close timer started (20 seconds)")
-                time.sleep(20)
+            fn, key = item
+            try:
+                fn()
+            except Exception as e:
+                logger.error("Error in background job %s: %s", key or getattr(fn, '__name__', fn), e, exc_info=True)
+            finally:
+                self._done(key)
+
+    def start_service(self, name, fn, restart=False, max_restarts=3):
+        """Run a long-lived loop on its own supervised thread"""
+        def supervise():
+            restarts = 0
+            while not self.stopping.is_set():
                 try:
-                    for w in webview.windows:
-                        w.destroy()
-                    logger.info("Window auto-closed")
+                    fn()
+                    return
                 except Exception as e:
-                    logger.error(f"Error in auto-close: {e}")
-            
-            # Start threads
-            focus_thread = Thread(target=bring_to_front, daemon=True)
-            focus_thread.start()
-            
-            close_thread = Thread(target=auto_close, daemon=True)
-            close_thread.start()
-            
-            logger.info("Starting webview...")
-            webview.start()
-            logger.info("Webview closed")
-            
-            # Clean up temp file
+                    logger.error("Service %s crashed: %s", name, e, exc_info=True)
+                if not restart or restarts >= max_restarts or self.stopping.wait(1.0):
+                    return
+                restarts += 1
+                logger.info("Restarting service %s (%s/%s)", name, restarts, max_restarts)
+        thread = Thread(target=supervise, name=f"{self.name}-{name}", daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        return thread
+
+    def shutdown(self, timeout=3.0):
+        """Stop accepting work and wait at most timeout seconds in total; returns True if everything finished"""
+        self.stopping.set()
+        # Drop queued jobs that haven't started; running ones get to finish
+        while True:
             try:
-                if os.path.exists(temp_html_path):
-                    os.remove(temp_html_path)
-                    logger.info("Temp file cleaned up")
-            except Exception as e:
-                logger.warning(f"Could not remove temp file: {e}")
-            
-            # Schedule next reminder
-            logger.info(f"Scheduling next reminder in {interval_minutes} minutes")
-            if timer_id:
-                root.after_cancel(timer_id)
-            timer_id = root.after(interval_minutes * 60 * 1000, show_message)
-                
-        except Exception as e:
-            logger.error(f"Error showing reminder: {e}", exc_info=True)
-            print(f"Error showing reminder: {e}")
-            # Fallback to schedule next reminder
-            if timer_id:
-                root.after_cancel(timer_id)
-            timer_id = root.after(interval_minutes * 60 * 1000, show_message)
+                _, key = self.queue.get_nowait()
+                self._done(key)
+            except (queue.Empty, TypeError):
+                break
+        for _ in self.threads:
+            try:
+                self.queue.put_nowait(None)
+            except queue.Full:
+                break
+        deadline = time.monotonic() + timeout
+        finished = True
+        for thread in self.threads:
+            if thread is current_thread():
+                continue
+            thread.join(max(0.0, deadline - time.monotonic()))
+            finished = finished and not thread.is_alive()
+        if not finished:
+            logger.warning("Background work still running after %.1f seconds; exiting anyway", timeout)
+        return finished
+
+# Scheduler (see scheduling.py) and the background workers
+scheduler = Scheduler(suspend_threshold=default_scheduler_settings['suspend_threshold_seconds'])
+worker_pool = WorkerPool()
+reminder_job = None  # Repeating ScheduledEvent that fires show_message (or samples activity in 'active' mode)
+active_time_tracker = None
+
+# Reminder window
+# One fullscreen webview window is created at startup and kept hidden between
+# reminders; each reminder pushes the message into the loaded page and shows it.
+REMINDER_DISPLAY_SECONDS = 20
+reminder_window = None
+reminder_visible = False
+reminder_triggered_at = None  # perf_counter() when the current reminder was requested
+reminder_jobs = []  # Scheduler handles owned by the reminder on screen
+reminder_raise_job = None  # Fallback bring-to-front, cancelled when the page reports it is shown
+app_quitting = False
+restart_requested = False  # set by restart_app(); the main thread relaunches on the way out
+
+def get_peak_rss_mb():
+    """Peak resident memory of this process in MB (None if it can't be read)"""
+    try:
+        if sys.platform == 'win32':
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [('cb', ctypes.c_ulong), ('PageFaultCount', ctypes.c_ulong),
+                            ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                            ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.PeakWorkingSetSize / (1024 * 1024)
+            return None
+        import resource
+        # ru_maxrss is in KB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except Exception:
+        return None
+
+# JavaScript API for the reminder page (window.pywebview.api)
+class ReminderApi:
+    def close_window(self):
+        renderer_logger.info("close_window API called")
+        hide_reminder()
+
+    def reminder_shown(self):
+        """Called by the page once the visible window has painted: raise it and record trigger-to-visible latency"""
+        on_reminder_shown()
+        if reminder_triggered_at is not None:
+            latency_ms = (time.perf_counter() - reminder_triggered_at) * 1000
+            peak_rss = get_peak_rss_mb()
+            renderer_logger.info("Reminder visible after %.0f ms (peak RSS %s MB)",
+                                 latency_ms, f"{peak_rss:.1f}" if peak_rss is not None else "n/a")
+
+def on_reminder_closing():
+    """Keep the warm window alive: closing it (e.g. Alt+F4) only hides it"""
+    if app_quitting:
+        return True
+    hide_reminder()
+    return False
+
+# index.html is read once at startup and kept in memory with its content hash
+reminder_template = None
+reminder_template_hash = None
+
+def load_reminder_template():
+    """Read and cache index.html; returns False if it is missing"""
+    global reminder_template, reminder_template_hash
+    html_path = os.path.join(get_resource_path(), "index.html")
+    renderer_logger.debug("HTML path: %s", html_path)
+    if not os.path.exists(html_path):
+        renderer_logger.error("index.html not found at: %s", html_path)
+        return False
+    with open(html_path, 'r', encoding='utf-8') as f:
+        reminder_template = f.read()
+    reminder_template_hash = hashlib.sha256(reminder_template.encode('utf-8')).hexdigest()
+    renderer_logger.debug("HTML template cached (sha256 %s)", reminder_template_hash[:12])
+    return True
+
+@lru_cache(maxsize=4)
+def render_reminder_page(template_hash, message):
+    """Fill the cached template in memory; keyed on the template hash so a new template is never mixed up with an old render"""
+    return (reminder_template
+            .replace('{{REMINDER_MESSAGE}}', html.escape(message))
+            .replace('{{WARM_WINDOW}}', 'true'))
+
+def create_reminder_window():
+    """Create the hidden reminder window once; must happen before start_renderer()"""
+    global reminder_window
+    if reminder_template is None and not load_reminder_template():
+        return
+    
+    # The page lives in memory; each reminder pushes its message through startReminder(),
+    # so showing a reminder touches no files
+    renderer_logger.debug("Creating webview window...")
+    reminder_window = webview.create_window(
+        'Eye Care Reminder',
+        html=render_reminder_page(reminder_template_hash, reminder_message),
+        fullscreen=True,
+        frameless=True,
+        on_top=True,
+        hidden=True,
+        js_api=ReminderApi()
+    )
+    reminder_window.events.closing += on_reminder_closing
+    renderer_logger.debug("Webview window created")
+
+def start_renderer():
+    """Run the webview loop on the main thread until the app quits (pywebview requires the main thread)"""
+    renderer_logger.debug("Starting webview...")
+    webview.start()
+    renderer_logger.info("Webview closed")
+
+def stop_renderer():
+    """Destroy the reminder window, which ends webview.start() on the main thread"""
+    global app_quitting
+    app_quitting = True
+    try:
+        if reminder_window is not None:
+            reminder_window.destroy()
+    except Exception as e:
+        renderer_logger.error("Error closing reminder window: %s", e)
+
+# Measuring the reminder window: `--bench-reminder` times the current warm
+# window against the old path, which created a window and ran webview.start()
+# for every reminder
+REMINDER_BENCH_MODES = ('warm', 'cold')
+
+class BenchReminderApi:
+    """js_api for --bench-reminder: records when the page reports it is on screen"""
+    def __init__(self):
+        self.shown = Event()
+        self.shown_at = None
+
+    def reminder_shown(self):
+        self.shown_at = time.perf_counter()
+        self.shown.set()
+
+    def close_window(self):
+        pass
+
+def benchmark_reminder(args):
+    """`--bench-reminder [warm|cold] [COUNT]`: trigger-to-visible latency and peak RSS of the reminder.
+
+    'warm' shows and hides one hidden window, as the app does now; 'cold'
+    creates a window and runs webview.start() per reminder, as it used to.
+    Latency runs from the trigger to the first frame painted while visible
+    (the page's reportShown()). Each mode needs its own process for a fair
+    peak RSS, so with no mode both are run that way, cold first. Peak RSS is
+    this process only, not the browser engine's helper processes.
+    """
+    count = 10
+    try:
+        if args and args[0] not in REMINDER_BENCH_MODES:
+            raise ValueError(args[0])
+        if len(args) > 1:
+            count = int(args[1])
+    except ValueError:
+        print("usage: EyeCare --bench-reminder [warm|cold] [COUNT]")
+        return 2
+    if not args:
+        command = [sys.executable] if getattr(sys, 'frozen', False) else [sys.executable, os.path.abspath(__file__)]
+        for mode in ('cold', 'warm'):
+            exit_code = subprocess.run(command + ['--bench-reminder', mode, str(count)]).returncode
+            if exit_code:
+                return exit_code
+        return 0
+    if not load_reminder_template():
+        print("index.html not found")
+        return 1
+    
+    mode = args[0]
+    api = BenchReminderApi()
+    latencies = []
+    def record(started):
+        if api.shown.wait(10):
+            latencies.append((api.shown_at - started) * 1000)
+        api.shown.clear()
+    
+    if mode == 'warm':
+        window = webview.create_window('Eye Care Reminder', html=render_reminder_page(reminder_template_hash, reminder_message),
+                                       fullscreen=True, frameless=True, on_top=True, hidden=True, js_api=api)
+        def drive():
+            for _ in range(count):
+                started = time.perf_counter()
+                window.evaluate_js(f"startReminder({json.dumps(reminder_message)}, {REMINDER_DISPLAY_SECONDS})")
+                window.show()
+                window.evaluate_js("reportShown()")
+                record(started)
+                window.evaluate_js("stopReminder()")
+                window.hide()
+                time.sleep(1.0)
+            window.destroy()
+        webview.start(drive)
+    else:
+        # The page as the old path served it: not warm, so it starts counting down on load
+        page = (reminder_template
+                .replace('{{REMINDER_MESSAGE}}', html.escape(reminder_message))
+                .replace('{{WARM_WINDOW}}', 'false'))
+        for _ in range(count):
+            started = time.perf_counter()
+            window = webview.create_window('Eye Care Reminder', html=page,
+                                           fullscreen=True, frameless=True, on_top=True, js_api=api)
+            window.events.loaded += lambda window=window: window.evaluate_js("reportShown()")
+            def close_when_shown(window=window, started=started):
+                record(started)
+                window.destroy()
+            webview.start(close_when_shown)
     
-    # Schedule to run on main thread
-    root.after(100, show_html_window)
+    peak_rss = get_peak_rss_mb()
+    latencies.sort()
+    if latencies:
+        print(f"{mode}: {len(latencies)}/{count} reminders shown, latency median {latencies[len(latencies) // 2]:.0f} ms, "
+              f"max {latencies[-1]:.0f} ms, peak RSS {f'{peak_rss:.1f}' if peak_rss is not None else 'n/a'} MB")
+    else:
+        print(f"{mode}: no reminder reported itself shown")
+    return 0 if len(latencies) == count else 1
+
+def cancel_reminder_jobs():
+    """Cancel the timers that belong to the reminder on screen"""
+    global reminder_jobs
+    for job in reminder_jobs:
+        job.cancel()
+    reminder_jobs = []
+
+def hide_reminder():
+    """Hide the reminder window and cancel its pending jobs"""
+    global reminder_visible
+    if not reminder_visible:
+        return
+    reminder_visible = False
+    cancel_reminder_jobs()
+    try:
+        reminder_window.evaluate_js("stopReminder()")
+        reminder_window.hide()
+        renderer_logger.info("Reminder hidden")
+    except Exception as e:
+        renderer_logger.error("Error hiding reminder: %s", e)
+
+def raise_reminder_window():
+    """Bring the reminder window to front using Windows API"""
+    global reminder_raise_job
+    reminder_raise_job = None
+    try:
+        if reminder_visible:
+            reminder_window.on_top = True
+            if sys.platform == 'win32':
+                # Simulate key press to allow SetForegroundWindow
+                ctypes.windll.user32.keybd_event(0, 0, 0, 0)
+            # Re-assert topmost once the foreground switch has gone through
+            reminder_jobs.append(scheduler.call_later(0.1, reassert_on_top))
+    except Exception as e:
+        renderer_logger.error("Error bringing window to front: %s", e)
+
+def reassert_on_top():
+    try:
+        if reminder_visible:
+            reminder_window.on_top = True
+            renderer_logger.info("Window brought to front")
+    except Exception as e:
+        renderer_logger.error("Error bringing window to front: %s", e)
+
+def on_reminder_shown():
+    """Window-shown event from the page: raise the window now instead of waiting on a timer"""
+    if reminder_raise_job is not None:
+        reminder_raise_job.cancel()
+        raise_reminder_window()
+
+def auto_close_reminder():
+    if reminder_visible:
+        hide_reminder()
+        renderer_logger.info("Window auto-closed")
+
+def show_html_window():
+    global reminder_visible, reminder_raise_job
+    renderer_logger.debug("show_html_window() starting")
+    try:
+        if reminder_window is None:
+            renderer_logger.error("Reminder window is not available")
+            return
+        if reminder_visible:
+            renderer_logger.info("Reminder already showing", extra={'rate_limit': True})
+            return
+        
+        reminder_visible = True
+        cancel_reminder_jobs()
+        # Auto-close after REMINDER_DISPLAY_SECONDS; raise the window when the page reports it is
+        # shown, or after a second if that event never arrives
+        renderer_logger.info("Auto-close timer started (%s seconds)", REMINDER_DISPLAY_SECONDS)
+        reminder_jobs.append(scheduler.call_later(REMINDER_DISPLAY_SECONDS, auto_close_reminder))
+        reminder_raise_job = scheduler.call_later(1.0, raise_reminder_window)
+        reminder_jobs.append(reminder_raise_job)
+        
+        # Fill in the page while hidden so it appears with the right message,
+        # then ask for the shown signal only once the window is on screen
+        reminder_window.evaluate_js(f"startReminder({json.dumps(reminder_message)}, {REMINDER_DISPLAY_SECONDS})")
+        reminder_window.show()
+        reminder_window.evaluate_js("reportShown()")
+    except Exception as e:
+        reminder_visible = False
+        cancel_reminder_jobs()
+        renderer_logger.error("Error showing reminder: %s", e, exc_info=True)
+        print(f"Error showing reminder: {e}")
+
+def show_message():
+    global reminder_triggered_at
+    scheduler_logger.debug("show_message() called")
+    if is_paused:
+        scheduler_logger.info("Timer is paused, skipping reminder", extra={'rate_limit': True})
+        return
+    reminder_triggered_at = time.perf_counter()
+    # The window is driven through pywebview's thread-safe API, so no hop through Tk is needed
+    show_html_window()
 
 def set_interval(minutes, label):
     global interval_minutes, selected_interval
     interval_minutes = minutes
     selected_interval = label
+    reschedule_timer()
     save_settings()
 
 def prompt_custom_interval():
-    custom_minutes = simpledialog.askinteger("Custom Interval", "Enter the interval in minutes:")
+    custom_minutes = simpledialog.askinteger("Custom Interval", "Enter the interval in minutes:", minvalue=1, maxvalue=24 * 60)
     if custom_minutes:
         set_interval(custom_minutes, f"Custom ({custom_minutes} min)")
 
 def set_custom_interval():
     root.after(0, prompt_custom_interval)
 
-def is_selected_interval(label):
-    return selected_interval == label or (selected_interval.startswith("Custom") and label.startswith("Custom"))
+def sample_active_time():
+    """Scheduler job for 'active' mode: show the reminder once enough active screen time has built up"""
+    if active_time_tracker.sample() >= interval_minutes * 60:
+        active_time_tracker.reset()
+        show_message()
+
+def arm_reminder_job(first_delay=None):
+    """(Re)start the repeating reminder every interval_minutes, first after first_delay seconds (default: one interval)"""
+    global reminder_job, active_time_tracker
+    if reminder_job is not None:
+        reminder_job.cancel()
+    if scheduler_settings['schedule_mode'] == 'active':
+        if active_time_tracker is None:
+            active_time_tracker = ActiveTimeTracker(get_idle_detector())
+        active_time_tracker.away_seconds = scheduler_settings['idle_away_seconds']
+        active_time_tracker.break_seconds = scheduler_settings['idle_break_minutes'] * 60
+        active_time_tracker.reset()
+        if first_delay == 0:
+            show_message()
+        reminder_job = scheduler.call_every(scheduler_settings['idle_sample_seconds'], sample_active_time)
+    else:
+        reminder_job = scheduler.call_every(interval_minutes * 60, show_message, first_delay)
+    schedule_tray_countdown()
+
+def handle_resume(gap_seconds):
+    """Apply resume_policy after a suspend; only the next deadline is recomputed, missed ticks are dropped"""
+    if is_paused or reminder_job is None:
+        return
+    if scheduler_settings['schedule_mode'] == 'active':
+        # Time asleep is a natural break
+        active_time_tracker.reset()
+        scheduler_logger.info("Resumed after %.0f seconds away; active time counter reset", gap_seconds)
+        return
+    policy = scheduler_settings['resume_policy']
+    arm_reminder_job(first_delay=resume_first_delay(policy, scheduler_settings['resume_grace_seconds']))
+    scheduler_logger.info("Resumed after %.0f seconds away; applied '%s' policy", gap_seconds, policy)
 
 def start_timer():
-    global is_paused, timer_id
+    global is_paused
     is_paused = False
-    # Cancel any existing timer
-    if timer_id:
-        root.after_cancel(timer_id)
-    timer_id = root.after(interval_minutes * 60 * 1000, show_message)
+    arm_reminder_job()
+    refresh_menu_state()
+
+def reschedule_timer():
+    """Restart the countdown with the current interval without touching the paused state"""
+    scheduler_logger.info("Rescheduling reminders every %s minutes", interval_minutes)
+    if not is_paused:
+        arm_reminder_job()
+
+def toggle_active_time_mode(icon, item):
+    """Switch between counting wall time and counting only active screen time"""
+    scheduler_settings['schedule_mode'] = 'elapsed' if scheduler_settings['schedule_mode'] == 'active' else 'active'
+    scheduler_logger.info("Schedule mode set to %s", scheduler_settings['schedule_mode'])
+    reschedule_timer()
+    save_settings()
 
 def pause_timer():
-    global is_paused
+    global is_paused, reminder_job
     is_paused = True
+    refresh_menu_state()
+    if reminder_job is not None:
+        reminder_job.cancel()
+        reminder_job = None
+    schedule_tray_countdown()
+
+def toggle_tray_countdown(icon, item):
+    """Show or hide the minutes-left countdown on the tray icon"""
+    tray_settings['tray_countdown'] = not tray_settings['tray_countdown']
+    tray_logger.info("Tray countdown %s", "on" if tray_settings['tray_countdown'] else "off")
+    schedule_tray_countdown()
+    save_settings()
 
 def open_developer_page():
     webbrowser.open("https://bibekchandsah.com.np/developer.html")
 
+# Update checks
+update_service = UpdateService(GITHUB_RELEASES_API_URL, os.path.join(get_app_path(), "update_cache.json"))
+
+# Staged updates
+UPDATE_STAGING_DIR = os.path.join(get_app_path(), "updates")
+update_download_thread = None
+
+def stage_delta_update(release, asset, dest, expected_sha256):
+    """Try to build dest from the running executable and a delta asset; returns True on success"""
+    delta_name = f"{asset['name']}.{CURRENT_VERSION}.delta"
+    delta_asset = next((a for a in release.get('assets', []) if a['name'] == delta_name), None)
+    if delta_asset is None:
+        return False
+    try:
+        status, _, patch = update_service.transport.get(delta_asset['url'], {'User-Agent': 'EyeCare-App'}, timeout=60)
+        if status != 200:
+            raise UpdateCheckError(f"HTTP {status}")
+        if apply_delta(sys.executable, patch, dest) != expected_sha256:
+            os.remove(dest)
+            raise ValueError("patched executable doesn't match the published checksum")
+    except (OSError, ValueError, UpdateCheckError) as e:
+        updater_logger.warning("Delta update failed (%s); downloading the full release", e)
+        return False
+    updater_logger.info("Staged %s from a %d byte delta patch", asset['name'], len(patch))
+    return True
+
+def delta_command(args):
+    """`--make-delta OLD NEW OUT` builds a patch and reports its size and apply time;
+    `--apply-delta OLD PATCH OUT` applies one"""
+    if len(args) != 4:
+        print("usage: EyeCare --make-delta OLD NEW OUT | --apply-delta OLD PATCH OUT")
+        return 2
+    command, old_path, second_path, out_path = args
+    if command == '--apply-delta':
+        with open(second_path, 'rb') as f:
+            patch = f.read()
+        started = time.perf_counter()
+        digest = apply_delta(old_path, patch, out_path)
+        print(f"applied in {time.perf_counter() - started:.2f} s, sha256 {digest}")
+        return 0
+    
+    with open(old_path, 'rb') as f:
+        old = f.read()
+    with open(second_path, 'rb') as f:
+        new = f.read()
+    started = time.perf_counter()
+    patch = make_delta(old, new)
+    make_seconds = time.perf_counter() - started
+    with open(out_path, 'wb') as f:
+        f.write(patch)
+    check_path = out_path + '.check'
+    started = time.perf_counter()
+    apply_delta(old_path, patch, check_path)
+    apply_seconds = time.perf_counter() - started
+    os.remove(check_path)
+    print(f"old {len(old)} bytes, new {len(new)} bytes")
+    print(f"delta {len(patch)} bytes ({100.0 * len(patch) / max(1, len(new)):.2f}% of a full download)")
+    print(f"made in {make_seconds:.2f} s, applied and verified in {apply_seconds:.2f} s")
+    return 0
+
+def make_delta_bench_pair(seed=42, size=30_000_000):
+    """Deterministic old/new executables for `--bench-delta`: random bytes with
+    a 50 KB rewrite in the middle and a 100 byte change near the end"""
+    rng = random.Random(seed)
+    old = rng.randbytes(size)
+    new = bytearray(old)
+    middle = size * 2 // 5
+    new[middle:middle + 48_000] = rng.randbytes(50_000)
+    new[size - 10_000:size - 9_900] = rng.randbytes(100)
+    return old, bytes(new)
+
+def benchmark_delta(args):
+    """`--bench-delta [SEED] [SIZE]`: build the seeded old/new pair, then make and apply a delta between them"""
+    try:
+        seed = int(args[0]) if len(args) > 0 else 42
+        size = int(args[1]) if len(args) > 1 else 30_000_000
+    except ValueError:
+        print("usage: EyeCare --bench-delta [SEED] [SIZE]")
+        return 2
+    old, new = make_delta_bench_pair(seed, size)
+    print(f"seed {seed}, new sha256 {hashlib.sha256(new).hexdigest()}")
+    with tempfile.TemporaryDirectory() as directory:
+        old_path = os.path.join(directory, 'old.exe')
+        new_path = os.path.join(directory, 'new.exe')
+        with open(old_path, 'wb') as f:
+            f.write(old)
+        with open(new_path, 'wb') as f:
+            f.write(new)
+        return delta_command(['--make-delta', old_path, new_path, os.path.join(directory, 'update.delta')])
+
+def stage_update(release):
+    """Download and verify the release asset; returns the staged path or None"""
+    asset = select_release_asset(release)
+    if asset is None:
+        updater_logger.info("No installable asset in release %s", release.get('tag_name'))
+        return None
+    expected_sha256 = get_asset_sha256(release, asset, update_service.transport)
+    if expected_sha256 is None:
+        updater_logger.warning("Release %s publishes no SHA-256 for %s; not staging it", release.get('tag_name'), asset['name'])
+        return None
+    
+    os.makedirs(UPDATE_STAGING_DIR, exist_ok=True)
+    dest = os.path.join(UPDATE_STAGING_DIR, f"{release['tag_name']}-{asset['name']}")
+    # Drop downloads for releases that have since been superseded
+    for name in os.listdir(UPDATE_STAGING_DIR):
+        if not os.path.join(UPDATE_STAGING_DIR, name).startswith(dest):
+            try:
+                os.remove(os.path.join(UPDATE_STAGING_DIR, name))
+            except OSError:
+                pass
+    if os.path.exists(dest):
+        return dest
+    if getattr(sys, 'frozen', False) and stage_delta_update(release, asset, dest, expected_sha256):
+        return dest
+    started = time.monotonic()
+    if not download_release_asset(asset['url'], dest, expected_sha256, update_service.transport, worker_pool.stopping):
+        return None
+    updater_logger.info("Staged %s (%d bytes) in %.1f s", asset['name'], os.path.getsize(dest), time.monotonic() - started)
+    return dest
+
+def start_update_download(release, show_in_progress=False):
+    """Stage release in the background at low priority, then offer it in the update dialog"""
+    global update_download_thread
+    if update_download_thread is not None and update_download_thread.is_alive():
+        updater_logger.debug("Update download already running", extra={'rate_limit': True})
+        if show_in_progress:
+            show_download_in_progress_notification(release['tag_name'])
+        return
+    
+    def download():
+        lower_thread_priority()
+        staged_path = None
+        try:
+            staged_path = stage_update(release)
+        except (OSError, UpdateCheckError) as e:
+            updater_logger.warning("Could not download update: %s", e)
+        if not worker_pool.stopping.is_set():
+            show_update_notification(release['tag_name'], staged_path)
+    
+    update_download_thread = worker_pool.start_service("update-download", download)
+
+def install_staged_update(staged_path):
+    """Swap the staged executable in for the running one and relaunch.
+
+    Windows won't delete a running executable but will rename it, so the old
+    one is moved aside to .old and removed on the next start.
+    """
+    exe = sys.executable
+    old_exe = exe + '.old'
+    if os.path.exists(old_exe):
+        os.remove(old_exe)
+    os.replace(exe, old_exe)
+    try:
+        os.replace(staged_path, exe)
+    except OSError:
+        os.replace(old_exe, exe)
+        raise
+    updater_logger.info("Installed update from %s, relaunching", staged_path)
+    # Only start the new instance once this one has let go of the tray,
+    # settings and log file
+    stop_services(tray_icon)
+    shutdown_logging()
+    try:
+        subprocess.Popen([exe] + sys.argv[1:])
+    finally:
+        root.quit()
+
+def remove_replaced_executable():
+    """Delete the executable left behind by the last staged install"""
+    if not getattr(sys, 'frozen', False):
+        return
+    old_exe = sys.executable + '.old'
+    try:
+        if os.path.exists(old_exe):
+            os.remove(old_exe)
+            updater_logger.info("Removed previous executable %s", old_exe)
+    except OSError as e:
+        updater_logger.warning("Could not remove %s: %s", old_exe, e)
+
 def check_for_updates(show_no_update=False):
     """Check GitHub for latest release version"""
-    logger.info("Checking for updates...")
+    updater_logger.info("Checking for updates...")
     try:
-        req = urllib.request.Request(GITHUB_API_URL)
-        req.add_header('User-Agent', 'EyeCare-App')
+        channel = update_settings['update_channel']
+        release = update_service.get_release_index(force=show_no_update).newest_update(CURRENT_VERSION, channel)
+        latest_version = release['tag_name'] if release else CURRENT_VERSION
         
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode())
-            latest_version = data.get('tag_name', '')
-            
-            logger.info(f"Current version: {CURRENT_VERSION}, Latest version: {latest_version}")
-            
-            if latest_version and latest_version != CURRENT_VERSION:
-                # New version available
-                logger.info("New update available!")
-                show_update_notification(latest_version)
+        updater_logger.info("Current version: %s, Latest version: %s (%s channel)", CURRENT_VERSION, latest_version, channel)
+        
+        if release is not None:
+            # New version available
+            updater_logger.info("New update available!")
+            if getattr(sys, 'frozen', False):
+                # Fetch it first so "Install" in the dialog is instant
+                start_update_download(release, show_in_progress=show_no_update)
             else:
-                logger.info("App is up to date")
-                if show_no_update:
-                    show_no_update_notification()
-    except urllib.error.URLError as e:
-        logger.warning(f"Could not check for updates (network error): {e}")
+                show_update_notification(latest_version)
+        else:
+            updater_logger.info("App is up to date")
+            if show_no_update:
+                show_no_update_notification()
+    except UpdateCheckError as e:
+        updater_logger.warning("Could not check for updates: %s", e)
         if show_no_update:
             show_network_error()
     except Exception as e:
-        logger.error(f"Error checking for updates: {e}")
+        updater_logger.error("Error checking for updates: %s", e)
         if show_no_update:
             show_network_error()
 
-def show_update_notification(latest_version):
-    """Show notification dialog about available update"""
+def show_update_notification(latest_version, staged_path=None):
+    """Show notification dialog about available update; a staged download can be installed directly"""
     # global update_notification_shown
     
     # Only show once per session
@@ -386,14 +1686,15 @@ def show_update_notification(latest_version):
             center_window(dialog, 400, 200)
             
             # Set icon
-            icon_path = os.path.join(get_resource_path(), "eyecare.ico")
-            if os.path.exists(icon_path):
-                dialog.iconbitmap(icon_path)
+            icon_assets.apply_to_window(dialog)
             
             dialog.attributes('-topmost', True)
             
             # Message
-            message = f"A new version ({latest_version}) is available!\n\nYou are currently using {CURRENT_VERSION}.\n\nWould you like to download the update?"
+            if staged_path:
+                message = f"A new version ({latest_version}) is ready to install.\n\nYou are currently using {CURRENT_VERSION}.\n\nEyeCare will restart to finish the update."
+            else:
+                message = f"A new version ({latest_version}) is available!\n\nYou are currently using {CURRENT_VERSION}.\n\nWould you like to download the update?"
             label = tk.Label(dialog, text=message, font=("Arial", 10), justify=tk.LEFT, wraplength=350)
             label.pack(pady=20, padx=20)
             
@@ -402,17 +1703,23 @@ def show_update_notification(latest_version):
             button_frame.pack(pady=10)
             
             def download_update():
-                webbrowser.open(GITHUB_NEW_RELEASES_URL)
                 dialog.destroy()
+                if staged_path:
+                    try:
+                        install_staged_update(staged_path)
+                        return
+                    except OSError as e:
+                        updater_logger.error("Could not install staged update: %s", e)
+                webbrowser.open(GITHUB_NEW_RELEASES_URL)
             
-            download_btn = tk.Button(button_frame, text="Download", command=download_update, width=12)
+            download_btn = tk.Button(button_frame, text="Install" if staged_path else "Download", command=download_update, width=12)
             download_btn.pack(side=tk.LEFT, padx=5)
             
             later_btn = tk.Button(button_frame, text="Later", command=dialog.destroy, width=12)
             later_btn.pack(side=tk.LEFT, padx=5)
             
         except Exception as e:
-            logger.error(f"Error showing update notification: {e}")
+            updater_logger.error("Error showing update notification: %s", e)
     
     root.after(0, show_dialog)
 
@@ -425,7 +1732,20 @@ def show_no_update_notification():
                 f"You are using the latest version ({CURRENT_VERSION})."
             )
         except Exception as e:
-            logger.error(f"Error showing no update dialog: {e}")
+            updater_logger.error("Error showing no update dialog: %s", e)
+    
+    root.after(0, show_dialog)
+
+def show_download_in_progress_notification(latest_version):
+    """Show message that an update is already being downloaded"""
+    def show_dialog():
+        try:
+            messagebox.showinfo(
+                "Update Downloading",
+                f"Version {latest_version} is already downloading.\nYou will be asked to install it when it is ready."
+            )
+        except Exception as e:
+            updater_logger.error("Error showing download progress dialog: %s", e)
     
     root.after(0, show_dialog)
 
@@ -438,63 +1758,223 @@ def show_network_error():
                 "Could not check for updates.\nPlease check your internet connection."
             )
         except Exception as e:
-            logger.error(f"Error showing network error dialog: {e}")
+            updater_logger.error("Error showing network error dialog: %s", e)
     
     root.after(0, show_dialog)
 
 def check_updates_manually():
     """Manually trigger update check (shows result regardless)"""
-    Thread(target=lambda: check_for_updates(show_no_update=True), daemon=True).start()
+    worker_pool.submit(lambda: check_for_updates(show_no_update=True), key='update-check')
 
 def check_updates_on_startup():
-    """Check for updates on startup (silent if no update)"""
-    Thread(target=lambda: check_for_updates(show_no_update=False), daemon=True).start()
+    """Check for updates on startup (silent if no update); runs as a background startup stage.
+
+    The check itself goes through the worker pool under the same 'update-check'
+    key as the menu item, so the two never run at once. The stage waits for it
+    to finish, so the startup timeline shows how long the check really took and
+    the stage timeout applies to the check rather than to queueing it.
+    """
+    remove_replaced_executable()
+    finished = Event()
+    def check():
+        try:
+            check_for_updates()
+        finally:
+            finished.set()
+    if not worker_pool.submit(check, key='update-check'):
+        updater_logger.debug("Update check already running, not checking again at startup")
+        return
+    # shutdown() drops queued jobs, so stop waiting once the pool is stopping
+    while not finished.wait(1.0):
+        if worker_pool.stopping.is_set():
+            return
+
+# Auto start
+def get_auto_start_command():
+    """What the OS should run at login: the exe when frozen, else this script"""
+    return os.path.abspath(sys.argv[0])
+
+class WindowsRegistryAutoStart:
+    """Auto start through the Run key under HKEY_CURRENT_USER"""
+    KEY = r'SOFTWARE\Microsoft\Windows\CurrentVersion\Run'
+    VALUE_NAME = 'EyeCareReminder'
+
+    def read(self):
+        try:
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.KEY, 0, winreg.KEY_READ) as reg_key:
+                value, _ = winreg.QueryValueEx(reg_key, self.VALUE_NAME)
+            return value == get_auto_start_command()
+        except FileNotFoundError:
+            return False
+
+    def write(self, enabled):
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.KEY, 0, winreg.KEY_SET_VALUE) as reg_key:
+            if enabled:
+                winreg.SetValueEx(reg_key, self.VALUE_NAME, 0, winreg.REG_SZ, get_auto_start_command())
+            else:
+                try:
+                    winreg.DeleteValue(reg_key, self.VALUE_NAME)
+                except FileNotFoundError:
+                    pass
+
+    def signature(self):
+        """Last write time of the Run key; changes whenever any entry in it does"""
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.KEY, 0, winreg.KEY_READ) as reg_key:
+            return winreg.QueryInfoKey(reg_key)[2]
+
+class XdgAutoStart:
+    """Auto start through a desktop entry in ~/.config/autostart"""
+    def __init__(self, path=None):
+        config_home = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+        self.path = path or os.path.join(config_home, 'autostart', 'EyeCare.desktop')
+
+    def exec_line(self):
+        command = get_auto_start_command()
+        if not getattr(sys, 'frozen', False):
+            command = f'"{sys.executable}" "{command}"'
+        return f"Exec={command}"
+
+    def read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return False
+        return self.exec_line() in lines and 'Hidden=true' not in lines
+
+    def write(self, enabled):
+        if not enabled:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write("[Desktop Entry]\nType=Application\nName=EyeCare\n"
+                    f"Comment=Eye care break reminders\n{self.exec_line()}\nX-GNOME-Autostart-enabled=true\n")
+        os.replace(temp_path, self.path)
+
+    def signature(self):
+        try:
+            stat = os.stat(self.path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+class MemoryAutoStart:
+    """Auto start that only lives in memory; for platforms without a backend, and for tests"""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.writes = 0
+
+    def read(self):
+        return self.enabled
+
+    def write(self, enabled):
+        self.enabled = enabled
+        self.writes += 1
+
+    def signature(self):
+        return self.writes
+
+def get_auto_start_backend():
+    if sys.platform == 'win32' and winreg is not None:
+        return WindowsRegistryAutoStart()
+    if sys.platform.startswith('linux'):
+        return XdgAutoStart()
+    return MemoryAutoStart()
+
+class CachedAutoStart:
+    """Keeps the last known auto start state so reading it costs nothing.
+
+    Our own writes update the cache directly. refresh() asks the backend for
+    a cheap signature (a key's last-write time, a file's stat) and only
+    re-reads the real state when that changed, e.g. after the user removed
+    the entry in Task Manager.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self.enabled = False
+        self.last_signature = object()
+
+    def refresh(self):
+        try:
+            current_signature = self.backend.signature()
+            if current_signature != self.last_signature:
+                self.enabled = self.backend.read()
+                self.last_signature = current_signature
+        except OSError as e:
+            logger.warning("Could not read auto start state: %s", e)
+        return self.enabled
+
+    def set_enabled(self, enabled):
+        self.backend.write(enabled)
+        self.enabled = enabled
+        try:
+            self.last_signature = self.backend.signature()
+        except OSError:
+            self.last_signature = object()
+
+auto_start = CachedAutoStart(get_auto_start_backend())
 
 def enable_auto_start():
     try:
-        key = r'SOFTWARE\Microsoft\Windows\CurrentVersion\Run'
-        reg = winreg.ConnectRegistry(None, winreg.HKEY_CURRENT_USER)
-        reg_key = winreg.OpenKey(reg, key, 0, winreg.KEY_SET_VALUE)
-        exe_path = os.path.abspath(sys.argv[0])
-        winreg.SetValueEx(reg_key, 'EyeCareReminder', 0, winreg.REG_SZ, exe_path)
-        winreg.CloseKey(reg_key)
-        print("Auto Start Enabled")
+        auto_start.set_enabled(True)
+        logger.info("Auto Start Enabled")
     except Exception as e:
-        print(f"Error enabling auto start: {e}")
+        logger.error("Error enabling auto start: %s", e)
 
 def disable_auto_start():
     try:
-        key = r'SOFTWARE\Microsoft\Windows\CurrentVersion\Run'
-        reg = winreg.ConnectRegistry(None, winreg.HKEY_CURRENT_USER)
-        reg_key = winreg.OpenKey(reg, key, 0, winreg.KEY_SET_VALUE)
-        winreg.DeleteValue(reg_key, 'EyeCareReminder')
-        winreg.CloseKey(reg_key)
-        print("Auto Start Disabled")
+        auto_start.set_enabled(False)
+        logger.info("Auto Start Disabled")
     except Exception as e:
-        print(f"Error disabling auto start: {e}")
+        logger.error("Error disabling auto start: %s", e)
 
 def toggle_auto_start(icon, item):
-    if is_auto_start_enabled():
+    global auto_start_enabled
+    if auto_start.refresh():
         disable_auto_start()
     else:
         enable_auto_start()
+    auto_start_enabled = is_auto_start_enabled()
     
     save_settings()
-    # Redraw the icon to reflect the updated state
-    icon.update_menu()
+
+def reconcile_auto_start():
+    """Make the OS auto start entry match the saved setting; with no settings file yet, adopt the OS state"""
+    global auto_start_enabled, adopt_os_auto_start, auto_start_reconciled
+    current = auto_start.refresh()
+    if adopt_os_auto_start:
+        auto_start_enabled = current
+        adopt_os_auto_start = False
+    elif auto_start_enabled != current:
+        if auto_start_enabled:
+            enable_auto_start()
+        else:
+            disable_auto_start()
+    auto_start_reconciled = True
+    refresh_menu_state()
+
+def check_auto_start():
+    """Pick up an auto start entry added or removed outside the app, e.g. in Task Manager.
+
+    auto_start.refresh() only compares a cheap signature, so this runs on
+    every settings watcher tick. The OS change wins and is saved.
+    """
+    global auto_start_enabled
+    if not auto_start_reconciled:
+        return
+    current = auto_start.refresh()
+    if current != auto_start_enabled:
+        logger.info("Auto start %s outside the app", "enabled" if current else "disabled")
+        auto_start_enabled = current
+        save_settings()
+    refresh_menu_state()
 
 def is_auto_start_enabled():
-    key = r'SOFTWARE\Microsoft\Windows\CurrentVersion\Run'
-    reg = winreg.ConnectRegistry(None, winreg.HKEY_CURRENT_USER)
-    try:
-        reg_key = winreg.OpenKey(reg, key, 0, winreg.KEY_READ)
-        value, regtype = winreg.QueryValueEx(reg_key, 'EyeCareReminder')
-        winreg.CloseKey(reg_key)
-        if value == os.path.abspath(sys.argv[0]):
-            return True
-        return False
-    except FileNotFoundError:
-        return False
+    """Cached auto start state; never touches the registry or the file system"""
+    return auto_start.enabled
 
 def show_custom_message_dialog():
     global reminder_message
@@ -508,9 +1988,7 @@ def show_custom_message_dialog():
         center_window(dialog, 400, 150)
         
         # Set the icon for the dialog
-        icon_path = os.path.join(get_resource_path(), "eyecare.ico")
-        if os.path.exists(icon_path):
-            dialog.iconbitmap(icon_path)
+        icon_assets.apply_to_window(dialog)
         
         # Make it topmost
         dialog.attributes('-topmost', True)
@@ -558,65 +2036,270 @@ def show_custom_message_dialog():
 def set_custom_message():
     root.after(0, show_custom_message_dialog)
 
+def show_log_viewer():
+    """Show the most recent log entries, newest first"""
+    try:
+        dialog = tk.Toplevel(root)
+        dialog.title("EyeCare Log")
+        center_window(dialog, 800, 500)
+        
+        icon_assets.apply_to_window(dialog)
+        
+        dialog.attributes('-topmost', True)
+        dialog.lift()
+        dialog.focus_force()
+        
+        scrollbar = tk.Scrollbar(dialog)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        text = tk.Text(dialog, wrap=tk.NONE, font=("Consolas", 9), yscrollcommand=scrollbar.set)
+        text.pack(fill=tk.BOTH, expand=True)
+        scrollbar.config(command=text.yview)
+        
+        # Only the tail of the log is read, so this stays fast for large files
+        text.insert(tk.END, "\n".join(read_log_newest_first(log_file, max_lines=1000)))
+        text.config(state=tk.DISABLED)
+        
+        dialog.bind('<Escape>', lambda e: dialog.destroy())
+    except Exception as e:
+        tray_logger.error("Error showing log viewer: %s", e)
+
+def view_log():
+    root.after(0, show_log_viewer)
+
 def test_reminder():
     """Test function to show reminder immediately without waiting"""
-    global timer_id
-    # Cancel the current scheduled timer to prevent double triggers
-    if timer_id:
-        root.after_cancel(timer_id)
-        timer_id = None
-        logger.info("Cancelled existing timer for test reminder")
-    # Show reminder immediately
+    # Show reminder immediately; the regular cadence is left alone
     show_message()
 
 def restore_defaults():
     global interval_minutes, selected_interval, reminder_message
     interval_minutes = default_interval_minutes
-    selected_interval = "20 minutes"
+    selected_interval = interval_label(default_interval_minutes)
     reminder_message = default_message
+    # The running reminder job (and the tray countdown) still use the old interval
+    reschedule_timer()
     save_settings()
 
-def setup_tray_icon():
-    logger.info("Setting up tray icon...")
+def set_log_level(level_name):
+    """Change the log level at runtime (from the tray menu) and remember it"""
+    log_settings['log_level'] = level_name
+    apply_log_levels()
+    logger.info("Log level set to %s", level_name)
+    save_settings()
+
+def is_log_level(level_name):
+    return str(log_settings['log_level']).upper() == level_name
+
+def set_update_channel(channel):
+    """Switch between stable releases and pre-releases for update checks"""
+    update_settings['update_channel'] = channel
+    updater_logger.info("Update channel set to %s", channel)
+    save_settings()
+
+tray_icon = None  # pystray Icon, set once the tray is running
+
+# Everything the tray menu shows as checked or enabled, precomputed. The
+# snapshot is read-only and replaced as a whole, so the tray thread always
+# sees a consistent state and opening the menu costs one lookup per item.
+MENU_UPDATE_DELAY = 0.05
+menu_state = MappingProxyType({})
+menu_state_lock = Lock()
+menu_update_job = None
+
+def build_menu_state():
+    state = {
+        'start': is_paused,
+        'pause': not is_paused,
+        'auto_start': is_auto_start_enabled(),
+        'active_time': scheduler_settings['schedule_mode'] == 'active',
+        'countdown': tray_settings['tray_countdown'],
+        'interval:Custom': selected_interval.startswith("Custom"),
+    }
+    for minutes in PRESET_INTERVALS:
+        state[f"interval:{interval_label(minutes)}"] = selected_interval == interval_label(minutes)
+    for level_name in ('DEBUG', 'INFO', 'WARNING', 'ERROR'):
+        state[f"log_level:{level_name}"] = is_log_level(level_name)
+    for channel in ('stable', 'beta'):
+        state[f"channel:{channel}"] = update_settings['update_channel'] == channel
+    return MappingProxyType(state)
+
+def refresh_menu_state():
+    """Rebuild the menu snapshot; if it changed, publish it and queue one menu redraw"""
+    global menu_state, menu_update_job
+    with menu_state_lock:
+        state = build_menu_state()
+        if state == menu_state:
+            return
+        menu_state = state
+        # A burst of changes (restore defaults, a settings reload) redraws once
+        if menu_update_job is None:
+            menu_update_job = scheduler.call_later(MENU_UPDATE_DELAY, update_tray_menu)
+
+def update_tray_menu():
+    global menu_update_job
+    with menu_state_lock:
+        menu_update_job = None
+    if tray_icon is not None:
+        tray_icon.update_menu()
+
+def menu_flag(key):
+    """checked=/enabled= callback that reads key from the current snapshot"""
+    return lambda item: menu_state[key]
+
+def build_tray_menu():
     interval_menu = Menu(
-        MenuItem("1 minute", lambda: set_interval(1, "1 minute"), checked=lambda item: is_selected_interval("1 minute")),
-        MenuItem("20 minutes", lambda: set_interval(20, "20 minutes"), checked=lambda item: is_selected_interval("20 minutes")),
-        MenuItem("25 minutes", lambda: set_interval(25, "25 minutes"), checked=lambda item: is_selected_interval("25 minutes")),
-        MenuItem("30 minutes", lambda: set_interval(30, "30 minutes"), checked=lambda item: is_selected_interval("30 minutes")),
-        MenuItem("60 minutes", lambda: set_interval(60, "60 minutes"), checked=lambda item: is_selected_interval("60 minutes")),
-        MenuItem("Custom...", set_custom_interval, checked=lambda item: selected_interval.startswith("Custom"))
+        MenuItem("1 minute", lambda: set_interval(1, "1 minute"), checked=menu_flag("interval:1 minute")),
+        MenuItem("20 minutes", lambda: set_interval(20, "20 minutes"), checked=menu_flag("interval:20 minutes")),
+        MenuItem("25 minutes", lambda: set_interval(25, "25 minutes"), checked=menu_flag("interval:25 minutes")),
+        MenuItem("30 minutes", lambda: set_interval(30, "30 minutes"), checked=menu_flag("interval:30 minutes")),
+        MenuItem("60 minutes", lambda: set_interval(60, "60 minutes"), checked=menu_flag("interval:60 minutes")),
+        MenuItem("Custom...", set_custom_interval, checked=menu_flag("interval:Custom"))
     )
 
-    # Load the icon from the ico file
-    icon_path = os.path.join(get_resource_path(), "eyecare.ico")
-    logger.info(f"Icon path: {icon_path}")
-    if os.path.exists(icon_path):
-        icon_image = Image.open(icon_path)
-        logger.info("Icon loaded from file")
-    else:
-        icon_image = create_image()
-        logger.warning("Icon file not found, using generated image")
-    
-    icon = Icon("EyeCare", icon_image, menu=Menu(
-        MenuItem("Start", start_timer, enabled=lambda item: is_paused),
-        MenuItem("Pause", pause_timer, enabled=lambda item: not is_paused),
-        MenuItem('Auto Start', toggle_auto_start, checked=lambda item: is_auto_start_enabled()),
+    log_level_menu = Menu(
+        MenuItem("Debug", lambda: set_log_level("DEBUG"), checked=menu_flag("log_level:DEBUG")),
+        MenuItem("Info", lambda: set_log_level("INFO"), checked=menu_flag("log_level:INFO")),
+        MenuItem("Warning", lambda: set_log_level("WARNING"), checked=menu_flag("log_level:WARNING")),
+        MenuItem("Error", lambda: set_log_level("ERROR"), checked=menu_flag("log_level:ERROR"))
+    )
+
+    return Menu(
+        MenuItem("Start", start_timer, enabled=menu_flag("start")),
+        MenuItem("Pause", pause_timer, enabled=menu_flag("pause")),
+        MenuItem('Auto Start', toggle_auto_start, checked=menu_flag("auto_start")),
         MenuItem("Message", set_custom_message),
         MenuItem("Reminder Interval", interval_menu),
+        MenuItem("Count Active Time Only", toggle_active_time_mode, checked=menu_flag("active_time")),
+        MenuItem("Show Countdown", toggle_tray_countdown, checked=menu_flag("countdown")),
         MenuItem("Restore Default", restore_defaults),
         Menu.SEPARATOR,
         MenuItem("Test Reminder", test_reminder),
         MenuItem("Check for Update", check_updates_manually),
+        MenuItem("Update Channel", Menu(
+            MenuItem("Stable", lambda: set_update_channel('stable'), checked=menu_flag("channel:stable")),
+            MenuItem("Beta", lambda: set_update_channel('beta'), checked=menu_flag("channel:beta"))
+        )),
+        MenuItem("View Log", view_log),
+        MenuItem("Log Level", log_level_menu),
         MenuItem("Developer", open_developer_page),
         MenuItem("Restart", lambda icon, item: restart_app(icon, item)),
         MenuItem("Quit", lambda icon, item: quit_app(icon, item))
-    ))
+    )
+
+def benchmark_menu_open(opens=100000):
+    """`--bench-menu`: time what pystray evaluates each time the menu is opened"""
+    refresh_menu_state()
+    menu = build_tray_menu()
+    def open_menu(menu):
+        for item in menu.items:
+            item.text, item.checked, item.enabled, item.visible
+            if item.submenu:
+                open_menu(item.submenu)
+    started = time.perf_counter()
+    for _ in range(opens):
+        open_menu(menu)
+    elapsed = time.perf_counter() - started
+    print(f"{opens} menu opens in {elapsed:.3f} s, {elapsed / opens * 1e6:.1f} us per open")
+    return 0
+
+# Cold start: total -X importtime cost of starting the app, per sys.platform,
+# recorded with headroom on a development machine. Raise one deliberately, not
+# by accident; a platform without an entry is measured and reported only.
+IMPORT_TIME_BUDGETS_MS = {
+    'linux': 250,
+    # Same import set as linux plus winreg; file opens go through the virus
+    # scanner and the PyInstaller bootloader, so allow a larger multiple
+    'win32': 400,
+}
+
+# EyeCare's own modules; what they import at load time counts as ours
+APP_MODULES = ('lazy_module', 'settings_store', 'scheduling', 'updater')
 
-    icon.run()
+def parse_import_times(stderr):
+    """Read -X importtime output; returns (total_us, [(cumulative_us, name)] for top-level
+    imports, names imported by this module or one of APP_MODULES)"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        # One leading space, then two more per level of nesting
+        entries.append(((len(name) - len(name.lstrip()) - 1) // 2, int(cumulative_us), name.strip()))
+    total_us = 0
+    top_level = []
+    ours = set()
+    # A module is listed after everything it imported, so walking backwards
+    # meets each parent before its children
+    parents = []
+    for depth, cumulative_us, name in reversed(entries):
+        del parents[depth:]
+        if depth == 0:
+            # Nested imports are already counted in their parent's cumulative time
+            total_us += cumulative_us
+            top_level.append((cumulative_us, name))
+        if all(parent in APP_MODULES for parent in parents):
+            ours.add(name)
+        parents.append(name)
+    top_level.reverse()
+    return total_us, top_level, ours
+
+def check_import_budget():
+    """`--check-import-budget`: cold-start the module under -X importtime; fails (exit 1)
+    if imports take longer than this platform's budget or this module loaded a
+    LAZY_MODULES entry at startup.
+
+    Only imports made by this module or APP_MODULES count as eager: pystray's
+    Windows backend imports ctypes itself, which is not something deferring
+    our own import can avoid.
+    """
+    if getattr(sys, 'frozen', False):
+        print("--check-import-budget needs a source checkout")
+        return 2
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--import-only'],
+        capture_output=True, text=True, timeout=120
+    )
+    total_us, top_level, ours = parse_import_times(result.stderr)
+    if result.returncode != 0 or not top_level:
+        print(f"import run failed (exit {result.returncode}):\n{result.stderr[-2000:]}")
+        return 1
+    eager = sorted(ours & set(LAZY_MODULES))
+    
+    budget_ms = IMPORT_TIME_BUDGETS_MS.get(sys.platform)
+    if budget_ms is None:
+        print(f"cold import {total_us / 1000:.0f} ms (no budget recorded for {sys.platform})")
+    else:
+        print(f"cold import {total_us / 1000:.0f} ms (budget {budget_ms} ms on {sys.platform})")
+    for cumulative_us, name in sorted(top_level, reverse=True)[:8]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    if eager:
+        print(f"loaded at startup but meant to be lazy: {', '.join(eager)}")
+    over_budget = budget_ms is not None and total_us / 1000 > budget_ms
+    return 1 if over_budget or eager else 0
+
+def setup_tray_icon():
+    tray_logger.info("Setting up tray icon...")
+    refresh_menu_state()
+
+    icon_image = icon_assets.image(get_tray_icon_size())
+    
+    global tray_icon, tray_base_image, tray_countdown_shown
+    tray_base_image = icon_image
+    tray_countdown_shown = None
+    tray_icon = icon = Icon("EyeCare", icon_image, menu=build_tray_menu())
+    icon.run(setup=on_tray_ready)
+
+def on_tray_ready(icon):
+    icon.visible = True
+    startup.mark("tray visible")
+    # Draw the first countdown as soon as the icon is up
+    schedule_tray_countdown()
 
 def run_tray_icon():
-    Thread(target=setup_tray_icon).start()
+    worker_pool.start_service("tray", setup_tray_icon, restart=True)
 
+@lru_cache(maxsize=1)
 def create_image():
     width = 64
     height = 64
@@ -626,51 +2309,403 @@ def create_image():
     draw.ellipse((width // 4, height // 4, 3 * width // 4, 3 * height // 4), fill=(255, 255, 255))
     return image
 
-def restart_app(icon, item):
-    icon.stop()
-    root.quit()
-    # Restart the application
-    os.execv(sys.executable, [sys.executable] + sys.argv)
+# Tray countdown
+# The icon shows the minutes left until the next break as a ring plus digits.
+# Every piece is drawn once into a sprite atlas (cached on disk per icon and
+# DPI), so a countdown frame is a few alpha composites and only happens
+# when the number shown actually changes: at most once a minute.
+TRAY_ATLAS_VERSION = 1
+TRAY_RING_STEPS = 12
+TRAY_GLYPHS = '0123456789h'
+SEVEN_SEGMENTS = {
+    '0': 'abcdef', '1': 'bc', '2': 'abdeg', '3': 'abcdg', '4': 'bcfg', '5': 'acdfg',
+    '6': 'acdefg', '7': 'abc', '8': 'abcdefg', '9': 'abcdfg', 'h': 'cefg',
+}
+tray_base_image = None       # undecorated tray icon
+tray_sprites = None          # sprites cut from the atlas, see load_tray_sprites
+tray_countdown_job = None
+tray_countdown_shown = None  # (text, ring step) currently on the icon
+tray_countdown_lock = Lock()
 
-def quit_app(icon, item):
-    logger.info("Application shutting down...")
+def get_screen_dpi():
+    if sys.platform == 'win32':
+        try:
+            return ctypes.windll.user32.GetDpiForSystem()
+        except (AttributeError, OSError):
+            pass
+    return 96
+
+def get_tray_icon_size():
+    """Pixel size for tray images at the current DPI"""
+    return max(16, round(32 * get_screen_dpi() / 96))
+
+def tray_sprite_layout(size):
+    """Cell size, glyph size, padding and stroke width for an atlas at size pixels"""
+    pad = max(1, size // 16)
+    glyph_height = size // 2 - pad
+    glyph_width = (size - 3 * pad) // 2
+    return pad, glyph_width, glyph_height, max(1, size // 10)
+
+def draw_seven_segment(draw, char, x, y, width, height, stroke, fill):
+    half = y + height // 2
+    boxes = {
+        'a': (x, y, x + width - 1, y + stroke - 1),
+        'b': (x + width - stroke, y, x + width - 1, half),
+        'c': (x + width - stroke, half, x + width - 1, y + height - 1),
+        'd': (x, y + height - stroke, x + width - 1, y + height - 1),
+        'e': (x, half, x + stroke - 1, y + height - 1),
+        'f': (x, y, x + stroke - 1, half),
+        'g': (x, half - stroke // 2, x + width - 1, half - stroke // 2 + stroke - 1),
+    }
+    for segment in SEVEN_SEGMENTS[char]:
+        draw.rectangle(boxes[segment], fill=fill)
+
+def render_tray_atlas(base_image, size):
+    """One row of size x size cells: base icon, digit plate, ring steps 0..N, then the glyphs"""
+    pad, glyph_width, glyph_height, stroke = tray_sprite_layout(size)
+    cells = 2 + (TRAY_RING_STEPS + 1) + len(TRAY_GLYPHS)
+    atlas = Image.new('RGBA', (size * cells, size), (0, 0, 0, 0))
+    atlas.paste(base_image.convert('RGBA').resize((size, size), Image.LANCZOS), (0, 0))
+    draw = ImageDraw.Draw(atlas)
+    draw.rounded_rectangle((size, size - glyph_height - 2 * pad, 2 * size - 1, size - 1), radius=pad * 2, fill=(0, 0, 0, 200))
+    for step in range(TRAY_RING_STEPS + 1):
+        if step:
+            left = (2 + step) * size
+            draw.arc((left + 1, 1, left + size - 2, size - 2), -90, -90 + 360 * step / TRAY_RING_STEPS,
+                     fill=(76, 175, 80, 255), width=max(2, size // 12))
+    for i, char in enumerate(TRAY_GLYPHS):
+        left = (3 + TRAY_RING_STEPS + i) * size
+        draw_seven_segment(draw, char, left, 0, glyph_width, glyph_height, stroke, (255, 255, 255, 255))
+    return atlas
+
+def load_tray_sprites(base_image, icon_digest):
+    """Load the atlas for this icon and DPI from disk, rendering and caching it on first use"""
+    dpi = get_screen_dpi()
+    size = get_tray_icon_size()
+    icon_hash = icon_digest[:16]
+    cache_dir = os.path.join(get_app_path(), "cache")
+    atlas_path = os.path.join(cache_dir, f"tray-atlas-v{TRAY_ATLAS_VERSION}-{icon_hash}-{dpi}.png")
+    cells = 2 + (TRAY_RING_STEPS + 1) + len(TRAY_GLYPHS)
+    atlas = None
+    try:
+        with Image.open(atlas_path) as cached:
+            if cached.size == (size * cells, size):
+                atlas = cached.convert('RGBA')
+    except OSError:
+        pass
+    if atlas is None:
+        atlas = render_tray_atlas(base_image, size)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_path = f"{atlas_path}.{os.getpid()}.tmp"
+            atlas.save(temp_path, format='PNG')
+            os.replace(temp_path, atlas_path)
+        except OSError as e:
+            tray_logger.warning("Could not cache tray sprites: %s", e)
+        tray_logger.info("Rendered tray sprite atlas (%dx%d, %d dpi)", atlas.width, atlas.height, dpi)
+    
+    pad, glyph_width, glyph_height, _ = tray_sprite_layout(size)
+    cell = lambda index, width=size, height=size: atlas.crop((index * size, 0, index * size + width, height))
+    return {
+        'size': size,
+        'base': cell(0),
+        'plate': cell(1),
+        'rings': [cell(2 + step) for step in range(TRAY_RING_STEPS + 1)],
+        'glyphs': {char: cell(3 + TRAY_RING_STEPS + i, glyph_width, glyph_height) for i, char in enumerate(TRAY_GLYPHS)},
+    }
+
+@lru_cache(maxsize=64)
+def compose_tray_frame(text, ring_step):
+    """Tray icon showing text (one or two glyphs) inside a ring ring_step/TRAY_RING_STEPS full"""
+    size = tray_sprites['size']
+    pad, glyph_width, glyph_height, _ = tray_sprite_layout(size)
+    frame = tray_sprites['base'].copy()
+    frame.alpha_composite(tray_sprites['rings'][ring_step])
+    frame.alpha_composite(tray_sprites['plate'])
+    left = (size - len(text) * glyph_width - (len(text) - 1) * pad) // 2
+    for char in text:
+        frame.alpha_composite(tray_sprites['glyphs'][char], (left, size - glyph_height - pad))
+        left += glyph_width + pad
+    return frame
+
+def get_seconds_until_reminder():
+    """Seconds until the next reminder, or None when paused"""
+    if is_paused or reminder_job is None:
+        return None
+    if scheduler_settings['schedule_mode'] == 'active':
+        if active_time_tracker is None:
+            return None
+        return max(0.0, interval_minutes * 60 - active_time_tracker.active_seconds)
+    return max(0.0, reminder_job.deadline - scheduler.clock())
+
+def countdown_label(minutes):
+    """Up to two glyphs: minutes below 100, whole hours below 10, else just 'h'"""
+    if minutes < 100:
+        return str(minutes)
+    hours = minutes // 60
+    return f"{hours}h" if hours < 10 else 'h'
+
+def update_tray_countdown():
+    """Show the current countdown on the tray icon, unless it already shows it"""
+    global tray_sprites, tray_countdown_shown
+    if tray_icon is None or tray_base_image is None:
+        return
+    seconds_left = get_seconds_until_reminder() if tray_settings['tray_countdown'] else None
+    if seconds_left is None:
+        state = None
+    else:
+        minutes_left = max(1, math.ceil(seconds_left / 60))
+        ring_step = math.ceil(TRAY_RING_STEPS * seconds_left / (interval_minutes * 60))
+        state = (countdown_label(minutes_left), min(TRAY_RING_STEPS, ring_step))
+    if state == tray_countdown_shown:
+        return
+    
+    if state is None:
+        tray_icon.icon = tray_base_image
+        tray_icon.title = "EyeCare"
+    else:
+        if tray_sprites is None:
+            tray_sprites = load_tray_sprites(tray_base_image, icon_assets.digest)
+            compose_tray_frame.cache_clear()
+        tray_icon.icon = compose_tray_frame(*state)
+        tray_icon.title = f"EyeCare - next break in {minutes_left} min"
+    tray_countdown_shown = state
+
+def schedule_tray_countdown():
+    """Refresh the countdown now and then each time the minutes shown change"""
+    global tray_countdown_job
+    with tray_countdown_lock:
+        if tray_countdown_job is not None:
+            tray_countdown_job.cancel()
+            tray_countdown_job = None
+        update_tray_countdown()
+        seconds_left = get_seconds_until_reminder() if tray_settings['tray_countdown'] else None
+        if seconds_left is None or tray_icon is None:
+            return
+        if scheduler_settings['schedule_mode'] == 'active':
+            # Active time only advances while someone is at the screen; check once a minute
+            tray_countdown_job = scheduler.call_every(60, update_tray_countdown)
+        else:
+            # Intervals are whole minutes, so ticking on the reminder's minute boundaries
+            # (just after them, so a reminder re-arms first) catches every change
+            tray_countdown_job = scheduler.call_every(60, update_tray_countdown, seconds_left % 60 + 0.5)
+
+def stop_services(icon):
+    """Stop everything except Tk and the log writer.
+
+    The tray comes down before the worker pool: its service thread sits in
+    icon.run() until icon.stop(), so shutting the pool down first would wait
+    out the full timeout on it.
+    """
+    stop_settings_watcher()
+    scheduler.stop()
+    flush_settings()
     try:
         icon.stop()
     except:
         pass
+    worker_pool.shutdown()
+
+def restart_app(icon, item):
+    """Shut down like quit_app; the main thread relaunches once everything has unwound.
+
+    This runs on the tray's daemon thread, which would be killed as soon as
+    the main thread ends, so it must not do the execv itself.
+    """
+    global restart_requested
+    logger.info("Application restarting...")
+    restart_requested = True
+    stop_services(icon)
+    flush_logs()
     try:
         root.quit()
     except:
         pass
 
-# Set up the main Tkinter window
-root = tk.Tk()
-root.withdraw()
+def quit_app(icon, item):
+    logger.info("Application shutting down...")
+    stop_services(icon)
+    flush_logs()
+    try:
+        root.quit()
+    except:
+        pass
+
+# Startup
+class StartupPipeline:
+    """Bring the app up in stages and record how long each one took.
+
+    run() stages are the critical path and run in order, right away.
+    defer() stages are housekeeping: after the critical path, a background
+    thread runs them by priority (lowest first), each on its own thread, so
+    one that hangs is abandoned after its timeout instead of holding up the
+    rest. The timeline is logged once the last deferred stage is done.
+    """
+    def __init__(self, origin, clock=time.perf_counter):
+        self.origin = origin
+        self.clock = clock
+        self.lock = Lock()
+        self.timeline = []  # (name, start in ms since origin, duration in ms, status)
+        self.deferred = []
+        self.counter = itertools.count()
+
+    def record(self, name, started, status='ok'):
+        now = self.clock()
+        with self.lock:
+            self.timeline.append((name, (started - self.origin) * 1000, (now - started) * 1000, status))
+
+    def mark(self, name):
+        """Record a moment rather than a stage, e.g. the tray icon appearing"""
+        self.record(name, self.clock(), 'mark')
+
+    def run(self, name, fn):
+        started = self.clock()
+        try:
+            fn()
+        except Exception as e:
+            logger.error("Startup stage %s failed: %s", name, e, exc_info=True)
+            self.record(name, started, 'failed')
+            return
+        self.record(name, started)
+
+    def defer(self, name, fn, priority=0, timeout=30.0):
+        heapq.heappush(self.deferred, (priority, next(self.counter), name, fn, timeout))
+
+    def start_background(self):
+        Thread(target=self._run_deferred, name="EyeCareStartup", daemon=True).start()
+
+    def _run_deferred(self):
+        while self.deferred and not worker_pool.stopping.is_set():
+            _, _, name, fn, timeout = heapq.heappop(self.deferred)
+            outcome = []
+            def stage():
+                try:
+                    fn()
+                    outcome.append('ok')
+                except Exception as e:
+                    logger.error("Startup stage %s failed: %s", name, e, exc_info=True)
+                    outcome.append('failed')
+            started = self.clock()
+            thread = Thread(target=stage, name=f"EyeCareStartup-{name}", daemon=True)
+            thread.start()
+            thread.join(timeout)
+            if not outcome:
+                logger.warning("Startup stage %s still running after %s seconds, moving on", name, timeout)
+            self.record(name, started, outcome[0] if outcome else 'timed out')
+        self.log_timeline()
+
+    def log_timeline(self):
+        with self.lock:
+            timeline = sorted(self.timeline, key=lambda entry: entry[1])
+        logger.info(
+            "Startup timeline: %s",
+            "; ".join(f"{name} +{start:.0f} ms ({duration:.1f} ms{'' if status == 'ok' else ', ' + status})"
+                      for name, start, duration, status in timeline),
+            extra={'startup_timeline': [
+                {'stage': name, 'start_ms': round(start, 1), 'duration_ms': round(duration, 1), 'status': status}
+                for name, start, duration, status in timeline
+            ]}
+        )
 
-# Load saved settings
-load_settings()
+startup = StartupPipeline(process_start)
+startup.record("module setup", process_start)
 
-# Check for updates on startup
-logger.info(f"Current version: {CURRENT_VERSION}")
-check_updates_on_startup()
+def start_tk():
+    global tk_thread
+    tk_thread = Thread(target=run_tk_loop, name="EyeCareTk", daemon=True)
+    tk_thread.start()
+    tk_ready.wait()
 
-# Start the tray icon
-run_tray_icon()
+def start_scheduling():
+    scheduler.on_resume = handle_resume
+    scheduler.start()
+    start_timer()
 
-# Start the timer
-start_timer()
+def start_renderer_window():
+    # Create the (hidden) reminder window up front so reminders show instantly
+    try:
+        create_reminder_window()
+    except Exception as e:
+        renderer_logger.error("Error creating reminder window: %s", e, exc_info=True)
+
+# Tk runs on its own thread; the main thread belongs to the reminder window
+tk_ready = Event()
+
+def run_tk_loop():
+    global root
+    # Set up the main Tkinter window
+    root = tk.Tk()
+    root.withdraw()
+    root.after(0, tk_ready.set)
+    try:
+        root.mainloop()
+    except Exception as e:
+        logger.error("Unexpected error in Tk loop: %s", e, exc_info=True)
+    finally:
+        try:
+            root.destroy()
+        except:
+            pass
+        # Tk is gone, so end the webview loop on the main thread too
+        stop_renderer()
 
-# Start the Tkinter main loop with exception handling
+# Release tooling and benchmarks that run without starting the app
+if running_tool:
+    if sys.argv[1] == '--bench-menu':
+        exit_code = benchmark_menu_open()
+    elif sys.argv[1] == '--bench-log':
+        exit_code = benchmark_log_append()
+    elif sys.argv[1] == '--bench-delta':
+        exit_code = benchmark_delta(sys.argv[2:])
+    elif sys.argv[1] == '--bench-reminder':
+        exit_code = benchmark_reminder(sys.argv[2:])
+    elif sys.argv[1] == '--check-import-budget':
+        exit_code = check_import_budget()
+    elif sys.argv[1] == '--import-only':
+        exit_code = 0
+    else:
+        exit_code = delta_command(sys.argv[1:])
+    shutdown_logging()
+    sys.exit(exit_code)
+
+logger.info("Current version: %s", CURRENT_VERSION)
+
+# Critical path: what it takes for the tray to be usable and reminders to be armed
+startup.run("tk", start_tk)
+startup.run("settings", load_settings)
+# The tray only needs PIL.Image, which is already loaded
+startup.run("tray", run_tray_icon)
+startup.run("timer", start_scheduling)
+startup.run("renderer", start_renderer_window)
+# Pick up edits to settings.json without a restart
+startup.run("settings watcher", start_settings_watcher)
+
+# Housekeeping, in the background once the app is up
+startup.defer("auto start", reconcile_auto_start, priority=0, timeout=5)
+startup.defer("log trim", trim_logs, priority=1, timeout=30)
+startup.defer("update check", check_updates_on_startup, priority=2, timeout=60)
+startup.start_background()
+
+# Run the webview loop on the main thread with exception handling
 try:
-    root.mainloop()
+    if reminder_window is not None:
+        start_renderer()
+    else:
+        # No renderer; just wait for the Tk loop to end
+        while tk_thread.is_alive():
+            tk_thread.join(0.5)
 except KeyboardInterrupt:
     logger.info("Application interrupted by user (Ctrl+C)")
     print("\nShutting down gracefully...")
-except Exception as e:
-    logger.error(f"Unexpected error in main loop: {e}", exc_info=True)
-finally:
-    logger.info("Application closed")
     try:
-        root.destroy()
+        root.quit()
     except:
         pass
+except Exception as e:
+    logger.error("Unexpected error in main loop: %s", e, exc_info=True)
+finally:
+    logger.info("Application closed")
+    # Write out queued log records before the process image is replaced
+    shutdown_logging()
+    if restart_requested:
+        os.execv(sys.executable, [sys.executable] + sys.argv)
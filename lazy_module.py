@@ -0,0 +1,24 @@
+"""Deferred imports shared by EyeCare and its modules"""
+import importlib
+
+class LazyModule:
+    """Stand-in for a module that is only imported when one of its attributes is first used.
+
+    Keeps heavy imports (the webview stack, HTTP client, ctypes) off the
+    startup path, so the tray comes up before they have been loaded.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            # importlib serialises concurrent imports of the same module
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}{' (loaded)' if self._module is not None else ''}>"
@@ -0,0 +1,269 @@
+"""Reminder scheduling: a monotonic, drift-free scheduler and active screen time tracking"""
+import heapq
+import itertools
+import logging
+import os
+import sys
+import time
+from threading import Thread, Condition
+
+from lazy_module import LazyModule
+
+ctypes = LazyModule('ctypes')
+
+scheduler_logger = logging.getLogger('EyeCare.scheduler')
+
+# Scheduler
+class ScheduledEvent:
+    """Handle for a callback registered with Scheduler; cancel() stops it from running"""
+    def __init__(self, deadline, callback, interval=None):
+        self.deadline = deadline
+        self.callback = callback
+        self.interval = interval  # None for one-shot events
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class Scheduler:
+    """Run callbacks at absolute deadlines on a monotonic clock.
+
+    Pending events sit in a heap ordered by deadline. Repeating events are
+    re-armed at first_deadline + k * interval before their callback runs, so
+    time spent in the callback (showing a reminder for 20 seconds, say) never
+    pushes later firings back. The clocks are injectable; run_pending() can be
+    driven directly with fake clocks instead of starting the thread.
+
+    Suspend detection: the thread wakes at least every check_interval seconds
+    and compares how far the monotonic and wall clocks moved. If the wall clock
+    got ahead by more than suspend_threshold (monotonic time stood still while
+    asleep, as on Linux), or the thread woke suspend_threshold later than it
+    asked to (monotonic time kept running, as on Windows), on_resume(gap) is
+    called before any due events run, so it can move deadlines first.
+    """
+    def __init__(self, clock=time.monotonic, wall_clock=time.time, check_interval=5.0, suspend_threshold=30.0):
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.check_interval = check_interval
+        self.suspend_threshold = suspend_threshold
+        self.on_resume = None
+        self.events = []
+        self.counter = itertools.count()
+        self.condition = Condition()
+        self.thread = None
+        self.stopped = False
+        self.last_sample = (clock(), wall_clock())
+
+    def check_clocks(self, expected_wake=None):
+        """Detect a suspend or wall-clock jump since the last check; returns the gap in seconds (0 if none)"""
+        mono, wall = self.clock(), self.wall_clock()
+        last_mono, last_wall = self.last_sample
+        self.last_sample = (mono, wall)
+        gap = (wall - last_wall) - (mono - last_mono)
+        if expected_wake is not None:
+            gap = max(gap, mono - expected_wake)
+        if gap <= self.suspend_threshold:
+            return 0
+        scheduler_logger.info("Clock gap of %.0f seconds detected (suspend/resume or clock change)", gap)
+        if self.on_resume is not None:
+            try:
+                self.on_resume(gap)
+            except Exception as e:
+                scheduler_logger.error("Error handling resume: %s", e, exc_info=True)
+        return gap
+
+    def call_at(self, deadline, callback, interval=None):
+        event = ScheduledEvent(deadline, callback, interval)
+        with self.condition:
+            heapq.heappush(self.events, (deadline, next(self.counter), event))
+            self.condition.notify()
+        return event
+
+    def call_later(self, delay, callback):
+        return self.call_at(self.clock() + delay, callback)
+
+    def call_every(self, interval, callback, first_delay=None):
+        """Run callback every interval seconds, first after first_delay (defaults to interval)"""
+        if first_delay is None:
+            first_delay = interval
+        return self.call_at(self.clock() + first_delay, callback, interval)
+
+    def next_deadline(self):
+        with self.condition:
+            self._drop_cancelled()
+            return self.events[0][0] if self.events else None
+
+    def _drop_cancelled(self):
+        while self.events and self.events[0][2].cancelled:
+            heapq.heappop(self.events)
+
+    def _pop_due(self, now):
+        """Take the next due event off the heap, re-arming it first if it repeats"""
+        with self.condition:
+            self._drop_cancelled()
+            if not self.events or self.events[0][0] > now:
+                return None
+            deadline, _, event = heapq.heappop(self.events)
+            if event.interval:
+                # Next multiple of the interval after now; missed ticks are skipped, not replayed
+                missed = int((now - deadline) // event.interval)
+                event.deadline = deadline + (missed + 1) * event.interval
+                heapq.heappush(self.events, (event.deadline, next(self.counter), event))
+            return event
+
+    def run_pending(self, expected_wake=None):
+        """Run every event whose deadline has passed; returns how many ran"""
+        count = 0
+        self.check_clocks(expected_wake)
+        now = self.clock()
+        while True:
+            event = self._pop_due(now)
+            if event is None:
+                return count
+            count += 1
+            try:
+                event.callback()
+            except Exception as e:
+                scheduler_logger.error("Error in scheduled callback: %s", e, exc_info=True)
+
+    def _run(self):
+        expected_wake = None
+        while True:
+            with self.condition:
+                if self.stopped:
+                    return
+                self._drop_cancelled()
+                now = self.clock()
+                timeout = self.check_interval
+                if self.events:
+                    timeout = min(timeout, self.events[0][0] - now)
+                if timeout > 0 and expected_wake is None:
+                    # Sleep until the next deadline, but wake regularly to sample the clocks
+                    expected_wake = now + timeout
+                    self.condition.wait(timeout)
+                    continue
+            # A notify() (new event) can wake us early; never report that as a suspend
+            self.run_pending(expected_wake if expected_wake is not None and self.clock() >= expected_wake else None)
+            expected_wake = None
+
+    def start(self):
+        self.thread = Thread(target=self._run, name="EyeCareScheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=2.0):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+def resume_first_delay(policy, grace_seconds):
+    """Seconds until the first reminder after a suspend under resume_policy; None means a full interval.
+
+    'reset' starts a full interval, 'fire_now' reminds right away and
+    'grace' waits grace_seconds. Reminders missed while asleep are never
+    replayed, whatever the policy.
+    """
+    if policy == 'fire_now':
+        return 0
+    if policy == 'grace':
+        return grace_seconds
+    return None
+
+# Idle detection for the 'active' schedule mode
+class StaticIdleDetector:
+    """Idle detector that reports a fixed idle time; the fallback when input can't be observed (always active)"""
+    def __init__(self, idle_seconds=0.0):
+        self.idle = idle_seconds
+
+    def idle_seconds(self):
+        return self.idle
+
+class Win32IdleDetector:
+    """Seconds since the last keyboard/mouse input, from GetLastInputInfo"""
+    def __init__(self):
+        class LASTINPUTINFO(ctypes.Structure):
+            _fields_ = [('cbSize', ctypes.c_uint), ('dwTime', ctypes.c_uint)]
+        self.info = LASTINPUTINFO()
+        self.info.cbSize = ctypes.sizeof(self.info)
+        self.user32 = ctypes.windll.user32
+        self.kernel32 = ctypes.windll.kernel32
+
+    def idle_seconds(self):
+        if not self.user32.GetLastInputInfo(ctypes.byref(self.info)):
+            return 0.0
+        # Both counters are 32-bit milliseconds and wrap together
+        return ((self.kernel32.GetTickCount() - self.info.dwTime) & 0xFFFFFFFF) / 1000.0
+
+class X11IdleDetector:
+    """Seconds since the last input on the X11 display, from the XScreenSaver extension"""
+    def __init__(self):
+        import ctypes.util
+        class XScreenSaverInfo(ctypes.Structure):
+            _fields_ = [('window', ctypes.c_ulong), ('state', ctypes.c_int), ('kind', ctypes.c_int),
+                        ('til_or_since', ctypes.c_ulong), ('idle', ctypes.c_ulong), ('eventMask', ctypes.c_ulong)]
+        xlib = ctypes.util.find_library('X11')
+        xss = ctypes.util.find_library('Xss')
+        if not xlib or not xss:
+            raise OSError("libX11/libXss not available")
+        self.xlib = ctypes.cdll.LoadLibrary(xlib)
+        self.xss = ctypes.cdll.LoadLibrary(xss)
+        self.xlib.XOpenDisplay.restype = ctypes.c_void_p
+        self.xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self.xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        self.xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(XScreenSaverInfo)
+        self.xss.XScreenSaverQueryInfo.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(XScreenSaverInfo)]
+        self.display = self.xlib.XOpenDisplay(None)
+        if not self.display:
+            raise OSError("No X11 display")
+        self.root_window = self.xlib.XDefaultRootWindow(self.display)
+        self.info = self.xss.XScreenSaverAllocInfo()
+
+    def idle_seconds(self):
+        if not self.xss.XScreenSaverQueryInfo(self.display, self.root_window, self.info):
+            return 0.0
+        return self.info.contents.idle / 1000.0
+
+def get_idle_detector():
+    """Pick the idle detector for this platform, falling back to 'always active'"""
+    try:
+        if sys.platform == 'win32':
+            return Win32IdleDetector()
+        if os.environ.get('DISPLAY'):
+            return X11IdleDetector()
+    except Exception as e:
+        scheduler_logger.warning("Idle detection not available: %s", e)
+    return StaticIdleDetector()
+
+class ActiveTimeTracker:
+    """Accumulate active screen time from periodic idle samples.
+
+    Each sample adds the time since the previous one, unless nobody has
+    touched the keyboard or mouse for away_seconds. Being idle for
+    break_seconds counts as a natural break and starts the count over.
+    """
+    def __init__(self, detector, away_seconds=60.0, break_seconds=300.0, clock=time.monotonic):
+        self.detector = detector
+        self.away_seconds = away_seconds
+        self.break_seconds = break_seconds
+        self.clock = clock
+        self.active_seconds = 0.0
+        self.last_sample = clock()
+
+    def reset(self):
+        self.active_seconds = 0.0
+        self.last_sample = self.clock()
+
+    def sample(self):
+        """Take one sample; returns the active seconds counted so far"""
+        now = self.clock()
+        elapsed = now - self.last_sample
+        self.last_sample = now
+        idle = self.detector.idle_seconds()
+        if idle >= self.break_seconds:
+            if self.active_seconds:
+                scheduler_logger.debug("Idle for %.0f seconds, counting it as a break", idle)
+            self.active_seconds = 0.0
+        elif idle < self.away_seconds:
+            self.active_seconds += elapsed
+        return self.active_seconds
@@ -0,0 +1,255 @@
+"""settings.json: defaults, the versioned schema with its migrations, and safe reads and writes.
+
+Every field has a precompiled validator in SETTINGS_SCHEMA. parse_settings()
+migrates raw file content to the current schema version and validates it in
+one pass; the app applies the result (see EyeCare.apply_settings).
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# Log retention defaults (each one can be overridden in settings.json)
+default_log_settings = {
+    'log_level': 'DEBUG',
+    'log_levels': {},                  # per-subsystem overrides, e.g. {"scheduler": "INFO"}
+    'log_format': 'json',              # 'json' (one object per line) or 'text'
+    'log_rate_limit_burst': 3,         # identical messages allowed per window...
+    'log_rate_limit_window': 300,      # ...of this many seconds before they are suppressed
+    'log_keep_sessions': 1,            # previous sessions kept at startup
+    'log_fsync_interval': 5.0,         # seconds between fsyncs
+    'log_max_bytes': 1024 * 1024,      # rotate when eyecare.log grows past this
+    'log_max_age_days': 7,             # rotate when eyecare.log is older than this
+    'log_archive_budget_bytes': 10 * 1024 * 1024,  # total size of all archives
+    'log_compression': 'gzip',         # 'gzip' or 'zstd' (needs the zstandard package)
+}
+
+# Settings schema
+# default_interval_minutes = 20
+default_interval_minutes = 1
+default_message = "Have a look far away from your current screen to protect your beautiful eyes"
+PRESET_INTERVALS = (1, 20, 25, 30, 60)
+LOG_LEVEL_NAMES = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+# Scheduling defaults (each one can be overridden in settings.json)
+default_scheduler_settings = {
+    'resume_policy': 'reset',          # after sleep: 'reset' (full interval), 'fire_now' or 'grace'
+    'resume_grace_seconds': 60,        # delay used by the 'grace' policy
+    'suspend_threshold_seconds': 30,   # clock gaps longer than this count as a suspend
+    'schedule_mode': 'elapsed',        # 'elapsed' (wall time) or 'active' (only time someone is at the screen)
+    'idle_sample_seconds': 5,          # how often input idle time is sampled in 'active' mode
+    'idle_away_seconds': 60,           # no input for this long: stop counting active time
+    'idle_break_minutes': 5,           # no input for this long: counts as a break, counter starts over
+}
+
+# Update defaults (each one can be overridden in settings.json)
+default_update_settings = {
+    'update_channel': 'stable',        # 'stable' (full releases only) or 'beta' (pre-releases too)
+}
+
+# Tray defaults (each one can be overridden in settings.json)
+default_tray_settings = {
+    'tray_countdown': True,            # show minutes until the next break on the tray icon
+}
+
+# Bump this and add a migration below whenever the layout of settings.json changes
+SETTINGS_SCHEMA_VERSION = 1
+
+def interval_label(minutes):
+    """Menu label for an interval, e.g. '1 minute', '20 minutes' or 'Custom (45 min)'"""
+    if minutes in PRESET_INTERVALS:
+        return "1 minute" if minutes == 1 else f"{minutes} minutes"
+    return f"Custom ({minutes} min)"
+
+def setting_field(default, types, check=None, coerce=None):
+    """Build the validator for one settings.json field.
+
+    The validator returns (value, ok). A value of the wrong type is passed
+    through coerce when given (e.g. "20" -> 20); anything still invalid is
+    replaced by the default and reported as not ok.
+    """
+    if not isinstance(types, tuple):
+        types = (types,)
+    
+    def validate(value):
+        # bool is a subclass of int, but true/false is never a valid number here
+        if isinstance(value, bool) and bool not in types:
+            return default, False
+        if not isinstance(value, types) and coerce is not None:
+            try:
+                value = coerce(value)
+            except (TypeError, ValueError):
+                return default, False
+        if isinstance(value, types) and (check is None or check(value)):
+            return value, True
+        return default, False
+    validate.default = default
+    return validate
+
+# Per-subsystem loggers that log_levels may override
+LOG_SUBSYSTEMS = ('scheduler', 'renderer', 'updater', 'tray', 'settings')
+
+def is_log_levels_map(value):
+    return all(name in LOG_SUBSYSTEMS and str(level).upper() in LOG_LEVEL_NAMES for name, level in value.items())
+
+# One precompiled validator per field; loading is a single pass over this table
+SETTINGS_SCHEMA = {
+    'schema_version': setting_field(SETTINGS_SCHEMA_VERSION, int),
+    'interval_minutes': setting_field(default_interval_minutes, int, lambda v: 1 <= v <= 24 * 60, coerce=int),
+    'selected_interval': setting_field(interval_label(default_interval_minutes), str),
+    'reminder_message': setting_field(default_message, str, lambda v: v.strip() != ''),
+    'auto_start': setting_field(False, bool),
+    'log_level': setting_field(default_log_settings['log_level'], str, lambda v: v.upper() in LOG_LEVEL_NAMES),
+    'log_levels': setting_field(default_log_settings['log_levels'], dict, is_log_levels_map),
+    'log_format': setting_field(default_log_settings['log_format'], str, lambda v: v in ('json', 'text')),
+    'log_keep_sessions': setting_field(default_log_settings['log_keep_sessions'], int, lambda v: v >= 0, coerce=int),
+    'log_fsync_interval': setting_field(default_log_settings['log_fsync_interval'], (int, float), lambda v: v > 0, coerce=float),
+    'log_max_bytes': setting_field(default_log_settings['log_max_bytes'], int, lambda v: v >= 0, coerce=int),
+    'log_max_age_days': setting_field(default_log_settings['log_max_age_days'], (int, float), lambda v: v >= 0, coerce=float),
+    'log_archive_budget_bytes': setting_field(default_log_settings['log_archive_budget_bytes'], int, lambda v: v >= 0, coerce=int),
+    'log_compression': setting_field(default_log_settings['log_compression'], str, lambda v: v in ('gzip', 'zstd')),
+    'log_rate_limit_burst': setting_field(default_log_settings['log_rate_limit_burst'], int, lambda v: v >= 0, coerce=int),
+    'log_rate_limit_window': setting_field(default_log_settings['log_rate_limit_window'], (int, float), lambda v: v > 0, coerce=float),
+    'resume_policy': setting_field(default_scheduler_settings['resume_policy'], str, lambda v: v in ('reset', 'fire_now', 'grace')),
+    'resume_grace_seconds': setting_field(default_scheduler_settings['resume_grace_seconds'], (int, float), lambda v: v >= 0, coerce=float),
+    'suspend_threshold_seconds': setting_field(default_scheduler_settings['suspend_threshold_seconds'], (int, float), lambda v: v > 0, coerce=float),
+    'schedule_mode': setting_field(default_scheduler_settings['schedule_mode'], str, lambda v: v in ('elapsed', 'active')),
+    'idle_sample_seconds': setting_field(default_scheduler_settings['idle_sample_seconds'], (int, float), lambda v: v >= 1, coerce=float),
+    'idle_away_seconds': setting_field(default_scheduler_settings['idle_away_seconds'], (int, float), lambda v: v > 0, coerce=float),
+    'idle_break_minutes': setting_field(default_scheduler_settings['idle_break_minutes'], (int, float), lambda v: v > 0, coerce=float),
+    'update_channel': setting_field(default_update_settings['update_channel'], str, lambda v: v in ('stable', 'beta')),
+    'tray_countdown': setting_field(default_tray_settings['tray_countdown'], bool),
+}
+
+def migrate_settings_v0(settings):
+    """v0 (no schema_version): selected_interval fell back to "20 minutes" whatever the interval was"""
+    settings = dict(settings)
+    if 'interval_minutes' in settings and 'selected_interval' not in settings:
+        try:
+            settings['selected_interval'] = interval_label(int(settings['interval_minutes']))
+        except (TypeError, ValueError):
+            pass
+    settings['schema_version'] = 1
+    return settings
+
+# Migrations from each old schema version to the next one
+SETTINGS_MIGRATIONS = {
+    0: migrate_settings_v0,
+}
+
+def migrate_settings(settings):
+    """Upgrade raw settings to SETTINGS_SCHEMA_VERSION; returns (settings, migrated)"""
+    version = settings.get('schema_version', 0)
+    if not isinstance(version, int) or isinstance(version, bool):
+        version = 0
+    migrated = False
+    while version < SETTINGS_SCHEMA_VERSION and version in SETTINGS_MIGRATIONS:
+        settings = SETTINGS_MIGRATIONS[version](settings)
+        version = settings['schema_version']
+        migrated = True
+    return settings, migrated
+
+def validate_settings(settings):
+    """Validate every field in one pass; returns (complete settings, names of repaired fields)"""
+    validated = {}
+    repaired = []
+    for name, validate in SETTINGS_SCHEMA.items():
+        if name in settings:
+            value, ok = validate(settings[name])
+            if not ok or value != settings[name]:
+                repaired.append(name)
+            validated[name] = value
+        else:
+            validated[name] = validate.default
+    # The menu label has to agree with the interval
+    minutes = validated['interval_minutes']
+    if validated['selected_interval'] not in (interval_label(minutes), f"Custom ({minutes} min)"):
+        if 'selected_interval' in settings:
+            repaired.append('selected_interval')
+        validated['selected_interval'] = interval_label(minutes)
+    validated['schema_version'] = SETTINGS_SCHEMA_VERSION
+    return validated, repaired
+
+def parse_settings(raw):
+    """Migrate and validate raw settings.json content; returns (settings, needs_write_back, repaired).
+
+    A file from a newer EyeCare (schema_version above SETTINGS_SCHEMA_VERSION)
+    is read for the fields this version knows, but never written back: that
+    would drop the fields it doesn't. settings['schema_version'] keeps the
+    newer number so callers can tell.
+    """
+    if not isinstance(raw, dict):
+        raw = {}
+    migrated_settings, migrated = migrate_settings(raw)
+    settings, repaired = validate_settings(migrated_settings)
+    version = raw.get('schema_version')
+    if isinstance(version, int) and not isinstance(version, bool) and version > SETTINGS_SCHEMA_VERSION:
+        settings['schema_version'] = version
+        return settings, False, repaired
+    return settings, migrated or bool(repaired), repaired
+
+def read_settings_file(path):
+    """Read settings.json without applying anything (returns {} if missing or unreadable)"""
+    try:
+        with open(path, 'r') as f:
+            settings = json.load(f)
+        return settings if isinstance(settings, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+@contextmanager
+def settings_file_lock(path, timeout=5.0):
+    """Advisory lock (path + '.lock') so two instances never write settings at the same time"""
+    lock_path = path + ".lock"
+    lock_file = open(lock_path, 'a+')
+    locked = False
+    try:
+        deadline = time.monotonic() + timeout
+        while not locked:
+            try:
+                if sys.platform == 'win32':
+                    import msvcrt
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                locked = True
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Could not lock {lock_path}")
+                time.sleep(0.05)
+        yield
+    finally:
+        if locked:
+            try:
+                if sys.platform == 'win32':
+                    import msvcrt
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            except OSError:
+                pass
+        lock_file.close()
+
+def write_json_atomic(path, data):
+    """Write JSON to a temp file, fsync it and rename it over path, so readers never see a partial file.
+
+    Returns the SHA-256 of the written bytes.
+    """
+    content = json.dumps(data, indent=4).encode('utf-8')
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return hashlib.sha256(content).hexdigest()
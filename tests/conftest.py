@@ -0,0 +1,22 @@
+"""Shared helpers for the EyeCare tests.
+
+EyeCare.py starts the whole app (Tk, tray, webview) when run, so tests
+import the modules it is built from (scheduling, updater, settings_store)
+instead.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeClock:
+    """A clock that only moves when told to; call it to read the time"""
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
@@ -0,0 +1,31 @@
+"""Cold-start import budget: runs `EyeCare.py --check-import-budget` in a fresh interpreter."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The check imports the whole app, so it needs the app's own dependencies
+pytest.importorskip('tkinter')
+pytest.importorskip('PIL')
+
+
+def test_import_budget(tmp_path):
+    env = dict(os.environ)
+    if sys.platform.startswith('linux') and not env.get('DISPLAY'):
+        # No X server: pystray's default backend can't even be imported
+        env.setdefault('PYSTRAY_BACKEND', 'dummy')
+    pystray_check = subprocess.run([sys.executable, '-c', 'import pystray'], env=env, capture_output=True)
+    if pystray_check.returncode != 0:
+        pytest.skip("pystray is not importable here")
+
+    before = set(os.listdir(ROOT))
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'EyeCare.py'), '--check-import-budget'],
+        capture_output=True, text=True, env=env, cwd=tmp_path, timeout=300
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    # Tool modes must not leave eyecare.log / eyecare.log.idx next to the app
+    assert set(os.listdir(ROOT)) - before - {'__pycache__'} == set()
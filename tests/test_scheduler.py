@@ -0,0 +1,181 @@
+"""Scheduler timing, driven through run_pending() with fake clocks instead of the scheduler thread."""
+import pytest
+
+from conftest import FakeClock
+from scheduling import ActiveTimeTracker, Scheduler, StaticIdleDetector, resume_first_delay
+
+INTERVAL = 20 * 60
+DAY = 24 * 60 * 60
+REMINDER_SECONDS = 20
+
+
+def make_scheduler(clock, **kwargs):
+    # The wall clock moves in step with the monotonic one, so no suspend is ever detected
+    return Scheduler(clock=clock, wall_clock=lambda: clock() + 1.7e9, **kwargs)
+
+
+def run_day(scheduler, clock, start, wake_late_by=0.0):
+    """Wake at each deadline (plus wake_late_by) for 24 hours, like the scheduler thread would"""
+    deadlines = []
+    while True:
+        deadline = scheduler.next_deadline()
+        if deadline is None or deadline > start + DAY:
+            return deadlines
+        deadlines.append(deadline)
+        clock.now = deadline + wake_late_by
+        scheduler.run_pending()
+
+
+def test_repeating_reminder_does_not_drift_over_a_day():
+    clock = FakeClock(1000.0)
+    scheduler = make_scheduler(clock)
+    fired = []
+
+    def remind():
+        # Showing the reminder takes REMINDER_SECONDS of the scheduler's time
+        fired.append(clock())
+        clock.advance(REMINDER_SECONDS)
+
+    start = clock()
+    scheduler.call_every(INTERVAL, remind)
+    run_day(scheduler, clock, start)
+
+    expected = [start + k * INTERVAL for k in range(1, DAY // INTERVAL + 1)]
+    assert fired == expected
+
+
+def test_late_wakeups_do_not_push_later_deadlines():
+    clock = FakeClock(1000.0)
+    scheduler = make_scheduler(clock)
+    fired = []
+
+    def remind():
+        fired.append(clock())
+        clock.advance(REMINDER_SECONDS)
+
+    start = clock()
+    scheduler.call_every(INTERVAL, remind)
+    deadlines = run_day(scheduler, clock, start, wake_late_by=0.75)
+
+    expected = [start + k * INTERVAL for k in range(1, DAY // INTERVAL + 1)]
+    assert deadlines == expected
+    assert fired == [deadline + 0.75 for deadline in expected]
+
+
+# Sleep and resume. Each policy should move only the next deadline: the
+# reminders that would have fallen inside the sleep are never replayed.
+SLEEP = 2 * 60 * 60
+GRACE = 60
+
+
+def linux_suspend(scheduler, mono, wall):
+    """Monotonic time stands still while asleep; only the wall clock jumps"""
+    wall.advance(SLEEP)
+    scheduler.run_pending()
+
+
+def windows_late_wake(scheduler, mono, wall):
+    """Monotonic time keeps running while asleep; the thread wakes long after it asked to"""
+    expected_wake = mono() + scheduler.check_interval
+    mono.advance(SLEEP)
+    wall.advance(SLEEP)
+    scheduler.run_pending(expected_wake)
+
+
+class Reminders:
+    """The app's repeating reminder job, re-armed by on_resume the way EyeCare.handle_resume does it"""
+    def __init__(self, policy):
+        self.mono = FakeClock(1000.0)
+        self.wall = FakeClock(1.7e9)
+        self.scheduler = Scheduler(clock=self.mono, wall_clock=self.wall, suspend_threshold=30)
+        self.scheduler.on_resume = self.on_resume
+        self.policy = policy
+        self.fired = []
+        self.job = None
+        self.arm()
+
+    def arm(self, first_delay=None):
+        if self.job is not None:
+            self.job.cancel()
+        self.job = self.scheduler.call_every(INTERVAL, lambda: self.fired.append(self.mono()), first_delay)
+
+    def on_resume(self, gap_seconds):
+        self.arm(resume_first_delay(self.policy, GRACE))
+
+
+@pytest.mark.parametrize('sleep', [linux_suspend, windows_late_wake])
+@pytest.mark.parametrize('policy, fires_on_wake, next_delay', [
+    ('reset', 0, INTERVAL),
+    ('fire_now', 1, INTERVAL),
+    ('grace', 0, GRACE),
+])
+def test_resume_policy_sets_next_deadline_without_replaying(sleep, policy, fires_on_wake, next_delay):
+    reminders = Reminders(policy)
+    scheduler, mono, wall = reminders.scheduler, reminders.mono, reminders.wall
+    # Five minutes in, the machine goes to sleep for two hours
+    mono.advance(300)
+    wall.advance(300)
+    assert scheduler.run_pending() == 0
+
+    sleep(scheduler, mono, wall)
+    woke_at = mono()
+
+    assert reminders.fired == [woke_at] * fires_on_wake
+    assert scheduler.next_deadline() == woke_at + next_delay
+    # Only the re-armed reminder is left; the one from before the sleep is gone
+    assert [event for _, _, event in scheduler.events if not event.cancelled] == [reminders.job]
+
+
+# Active screen time, sampled every SAMPLE seconds (scheduler_settings['idle_sample_seconds'])
+SAMPLE = 5
+
+
+def make_tracker():
+    clock = FakeClock(1000.0)
+    detector = StaticIdleDetector()
+    return ActiveTimeTracker(detector, away_seconds=60, break_seconds=300, clock=clock), detector, clock
+
+
+def sample_for(tracker, clock, detector, seconds):
+    """Sample every SAMPLE seconds while the idle time grows (or stays 0 if the user is typing)"""
+    idle_growing = detector.idle > 0
+    for _ in range(int(seconds // SAMPLE)):
+        clock.advance(SAMPLE)
+        if idle_growing:
+            detector.idle += SAMPLE
+        tracker.sample()
+    return tracker.active_seconds
+
+
+def test_active_time_counts_while_the_user_is_active():
+    tracker, detector, clock = make_tracker()
+    assert sample_for(tracker, clock, detector, 600) == 600
+
+
+def test_active_time_stops_once_the_user_is_away():
+    tracker, detector, clock = make_tracker()
+    sample_for(tracker, clock, detector, 600)
+
+    # Walk away: short pauses still count, past away_seconds nothing is added
+    detector.idle = 1
+    active = sample_for(tracker, clock, detector, 55)
+    assert active == 655
+    assert sample_for(tracker, clock, detector, 120) == 655
+
+    # Back before a full break: counting resumes from where it stopped
+    detector.idle = 0
+    assert sample_for(tracker, clock, detector, 60) == 715
+
+
+def test_a_long_enough_break_resets_active_time():
+    tracker, detector, clock = make_tracker()
+    sample_for(tracker, clock, detector, 600)
+
+    detector.idle = 1
+    sample_for(tracker, clock, detector, 290)
+    assert tracker.active_seconds > 0
+    sample_for(tracker, clock, detector, 20)
+    assert tracker.active_seconds == 0
+
+    detector.idle = 0
+    assert sample_for(tracker, clock, detector, 30) == 30
@@ -0,0 +1,29 @@
+"""settings.json parsing: migrations, repairs and files from newer versions."""
+from settings_store import SETTINGS_SCHEMA_VERSION, default_message, interval_label, parse_settings
+
+
+def test_v0_file_is_migrated_and_written_back():
+    settings, needs_write_back, repaired = parse_settings({'interval_minutes': 25})
+    assert settings['schema_version'] == SETTINGS_SCHEMA_VERSION
+    assert settings['selected_interval'] == interval_label(25)
+    assert needs_write_back
+    assert repaired == []
+
+
+def test_bad_fields_are_repaired():
+    settings, needs_write_back, repaired = parse_settings(
+        {'schema_version': SETTINGS_SCHEMA_VERSION, 'interval_minutes': '30', 'reminder_message': None, 'auto_start': 'yes'})
+    assert settings['interval_minutes'] == 30
+    # null is not a message; it falls back to the default text, not "None"
+    assert settings['reminder_message'] == default_message
+    assert settings['auto_start'] is False
+    assert sorted(repaired) == ['auto_start', 'interval_minutes', 'reminder_message']
+    assert needs_write_back
+
+
+def test_newer_file_is_read_but_never_written_back():
+    settings, needs_write_back, repaired = parse_settings(
+        {'schema_version': SETTINGS_SCHEMA_VERSION + 1, 'interval_minutes': 'soon', 'some_new_field': True})
+    assert settings['schema_version'] == SETTINGS_SCHEMA_VERSION + 1
+    assert repaired == ['interval_minutes']
+    assert not needs_write_back
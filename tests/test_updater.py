@@ -0,0 +1,220 @@
+"""Update service and downloads against a local HTTP stand-in for GitHub."""
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import FakeClock
+from updater import (
+    UPDATE_BACKOFF_BASE, UPDATE_CACHE_TTL, UpdateCheckError, UpdateService, UrllibTransport,
+    download_release_asset,
+)
+
+RELEASES = [
+    {'tag_name': 'v1.1.0', 'prerelease': False, 'draft': False, 'html_url': '', 'assets': []},
+    {'tag_name': 'v1.0.2', 'prerelease': False, 'draft': False, 'html_url': '', 'assets': []},
+]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers every GET with whatever server.respond(handler) returns: (status, headers, body)"""
+    def do_GET(self):
+        self.server.requests.append(self.headers)
+        status, headers, body = self.server.respond(self)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    for name in ('http_proxy', 'HTTP_PROXY', 'all_proxy', 'ALL_PROXY'):
+        monkeypatch.delenv(name, raising=False)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    httpd.requests = []
+    httpd.url = f"http://127.0.0.1:{httpd.server_port}"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def releases_api(etag='"r1"', extra_headers=None):
+    """Respond like the releases API: 200 with an ETag, or 304 when the client already has it"""
+    def respond(handler):
+        headers = dict(extra_headers or {})
+        if handler.headers.get('If-None-Match') == etag:
+            return 304, headers, b''
+        headers.update({'ETag': etag, 'Content-Type': 'application/json'})
+        return 200, headers, json.dumps(RELEASES).encode('utf-8')
+    return respond
+
+
+def make_service(server, tmp_path, clock):
+    return UpdateService(f"{server.url}/releases", str(tmp_path / 'update_cache.json'), clock=clock)
+
+
+def test_etag_turns_a_refresh_into_a_304(server, tmp_path):
+    server.respond = releases_api()
+    service = make_service(server, tmp_path, FakeClock(1.7e9))
+
+    first = service.get_release_index()
+    second = service.get_release_index(force=True)
+
+    assert len(server.requests) == 2
+    assert server.requests[0].get('If-None-Match') is None
+    assert server.requests[1].get('If-None-Match') == '"r1"'
+    assert second is first
+    assert first.newest_update('v1.0.2')['tag_name'] == 'v1.1.0'
+
+
+def test_cached_metadata_is_reused_until_the_ttl_runs_out(server, tmp_path):
+    server.respond = releases_api()
+    clock = FakeClock(1.7e9)
+    service = make_service(server, tmp_path, clock)
+
+    service.get_release_index()
+    clock.advance(UPDATE_CACHE_TTL - 1)
+    service.get_release_index()
+    assert len(server.requests) == 1
+
+    clock.advance(2)
+    service.get_release_index()
+    assert len(server.requests) == 2
+    assert server.requests[1].get('If-None-Match') == '"r1"'
+
+    # The cache is on disk, so a restarted app reuses it too
+    restarted = make_service(server, tmp_path, clock)
+    restarted.get_release_index()
+    assert len(server.requests) == 2
+
+
+def test_server_errors_back_off_exponentially(server, tmp_path):
+    server.respond = lambda handler: (500, {}, b'oops')
+    clock = FakeClock(1.7e9)
+    service = make_service(server, tmp_path, clock)
+
+    waits = []
+    for failures in range(1, 4):
+        with pytest.raises(UpdateCheckError):
+            service.get_release_index(force=True)
+        assert len(server.requests) == failures
+        wait = service.cache['next_attempt'] - clock()
+        # Full jitter: between half and all of BASE * 2^(failures - 1)
+        delay = UPDATE_BACKOFF_BASE * 2 ** (failures - 1)
+        assert delay / 2 <= wait <= delay
+        waits.append(wait)
+
+        # Until then not even a forced check reaches the server
+        clock.advance(wait - 1)
+        with pytest.raises(UpdateCheckError):
+            service.get_release_index(force=True)
+        assert len(server.requests) == failures
+        clock.advance(1)
+
+    # A success clears the backoff
+    server.respond = releases_api()
+    service.get_release_index(force=True)
+    assert service.cache['failures'] == 0
+
+
+def test_exhausted_rate_limit_holds_requests_until_reset(server, tmp_path):
+    clock = FakeClock(1.7e9)
+    reset_at = int(clock() + UPDATE_CACHE_TTL + 3600)
+    server.respond = releases_api(extra_headers={'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(reset_at)})
+    service = make_service(server, tmp_path, clock)
+
+    index = service.get_release_index()
+    assert len(server.requests) == 1
+
+    # Past the TTL but before the reset, the cached releases are served without a request
+    clock.advance(UPDATE_CACHE_TTL + 1)
+    assert service.get_release_index(force=True) is index
+    assert len(server.requests) == 1
+
+    clock.now = reset_at
+    server.respond = releases_api()
+    service.get_release_index(force=True)
+    assert len(server.requests) == 2
+
+
+ASSET = bytes(range(256)) * 1024
+ASSET_SHA256 = hashlib.sha256(ASSET).hexdigest()
+
+
+def asset_server(honor_range=True):
+    """Serve ASSET, answering Range requests with 206 (or 416 past the end) unless honor_range is off"""
+    def respond(handler):
+        requested = handler.headers.get('Range')
+        if not (honor_range and requested):
+            return 200, {}, ASSET
+        start = int(requested[len('bytes='):].rstrip('-'))
+        if start >= len(ASSET):
+            return 416, {'Content-Range': f"bytes */{len(ASSET)}"}, b''
+        content_range = f"bytes {start}-{len(ASSET) - 1}/{len(ASSET)}"
+        return 206, {'Content-Range': content_range}, ASSET[start:]
+    return respond
+
+
+def download(server, tmp_path, expected_sha256=ASSET_SHA256):
+    dest = str(tmp_path / 'EyeCare.exe')
+    ok = download_release_asset(f"{server.url}/asset", dest, expected_sha256, UrllibTransport(), chunk_size=4096)
+    return ok, dest
+
+
+def test_download_resumes_from_the_partial_file(server, tmp_path):
+    server.respond = asset_server()
+    (tmp_path / 'EyeCare.exe.part').write_bytes(ASSET[:100000])
+
+    ok, dest = download(server, tmp_path)
+
+    assert ok
+    assert server.requests[0].get('Range') == 'bytes=100000-'
+    with open(dest, 'rb') as f:
+        assert f.read() == ASSET
+    assert not os.path.exists(dest + '.part')
+
+
+def test_download_restarts_when_the_server_ignores_range(server, tmp_path):
+    server.respond = asset_server(honor_range=False)
+    (tmp_path / 'EyeCare.exe.part').write_bytes(b'stale bytes from another build')
+
+    ok, dest = download(server, tmp_path)
+
+    assert ok
+    assert server.requests[0].get('Range') == f"bytes={len(b'stale bytes from another build')}-"
+    with open(dest, 'rb') as f:
+        assert f.read() == ASSET
+
+
+def test_download_finishes_an_already_complete_partial_file(server, tmp_path):
+    server.respond = asset_server()
+    (tmp_path / 'EyeCare.exe.part').write_bytes(ASSET)
+
+    ok, dest = download(server, tmp_path)
+
+    assert ok
+    assert server.requests[0].get('Range') == f"bytes={len(ASSET)}-"
+    with open(dest, 'rb') as f:
+        assert f.read() == ASSET
+    assert not os.path.exists(dest + '.part')
+
+
+def test_checksum_mismatch_discards_the_download(server, tmp_path):
+    server.respond = asset_server()
+    (tmp_path / 'EyeCare.exe.part').write_bytes(ASSET[:100000])
+
+    with pytest.raises(UpdateCheckError, match='checksum mismatch'):
+        download(server, tmp_path, expected_sha256='0' * 64)
+
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,525 @@
+"""Update checks and staged updates: release metadata with caching and backoff,
+resumable verified downloads, and delta patches between executables"""
+import codecs
+import hashlib
+import itertools
+import json
+import logging
+import lzma
+import os
+import random
+import re
+import struct
+import sys
+import time
+from bisect import bisect_right
+from datetime import datetime
+from threading import Lock, get_native_id
+
+from lazy_module import LazyModule
+from settings_store import write_json_atomic
+
+urllib_request = LazyModule('urllib.request')
+urllib_error = LazyModule('urllib.error')
+ctypes = LazyModule('ctypes')
+
+updater_logger = logging.getLogger('EyeCare.updater')
+
+# Update checks
+UPDATE_CACHE_TTL = 6 * 60 * 60          # seconds before cached release metadata is refreshed
+UPDATE_BACKOFF_BASE = 60                # first retry delay after a failed check
+UPDATE_BACKOFF_MAX = 24 * 60 * 60       # longest retry delay
+
+class UpdateCheckError(Exception):
+    """Release metadata could not be fetched (network error, bad response or backing off)"""
+
+class UrllibTransport:
+    """HTTP transport for the update service; swap it out to test against a local stand-in server"""
+    def get(self, url, headers, timeout=10):
+        """GET url; returns (status, lower-cased headers, body). Non-2xx statuses are returned, not raised"""
+        req = urllib_request.Request(url, headers=headers)
+        try:
+            with urllib_request.urlopen(req, timeout=timeout) as response:
+                return response.status, {k.lower(): v for k, v in response.headers.items()}, response.read()
+        except urllib_error.HTTPError as e:
+            # urllib raises for 304 as well as for real errors
+            headers = {k.lower(): v for k, v in (e.headers or {}).items()}
+            return e.code, headers, e.read() if e.fp else b''
+
+    def open(self, url, headers, timeout=30):
+        """Start a streaming GET; returns (status, lower-cased headers, response). Close the response when done"""
+        req = urllib_request.Request(url, headers=headers)
+        try:
+            response = urllib_request.urlopen(req, timeout=timeout)
+        except urllib_error.HTTPError as e:
+            response = e
+        return response.code, {k.lower(): v for k, v in (response.headers or {}).items()}, response
+
+def summarize_release(data):
+    """Keep only the release fields the updater uses"""
+    return {
+        'tag_name': data.get('tag_name', ''),
+        'prerelease': bool(data.get('prerelease', False)),
+        'draft': bool(data.get('draft', False)),
+        'html_url': data.get('html_url', ''),
+        'assets': [
+            {
+                'name': asset.get('name', ''),
+                'size': asset.get('size', 0),
+                'url': asset.get('browser_download_url', ''),
+                'digest': asset.get('digest'),
+            }
+            for asset in data.get('assets', []) if isinstance(asset, dict)
+        ],
+    }
+
+UPDATE_PAGE_SIZE = 100                 # releases per API page
+UPDATE_MAX_PAGES = 5                    # older releases than this can't be newer than ours
+
+SEMVER_PATTERN = re.compile(r'^v?(\d+)\.(\d+)\.(\d+)(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$')
+
+def parse_version(tag):
+    """Sort key for a semver tag such as 'v1.0.2' or 'v1.1.0-beta.2', or None if it isn't one.
+
+    A pre-release sorts below the release it precedes, and its dot-separated
+    identifiers compare numerically when numeric, as semver specifies.
+    """
+    match = SEMVER_PATTERN.match(tag.strip()) if isinstance(tag, str) else None
+    if match is None:
+        return None
+    major, minor, patch, prerelease = match.groups()
+    if prerelease is None:
+        return (int(major), int(minor), int(patch), 1, ())
+    identifiers = tuple((0, int(part), '') if part.isdigit() else (1, 0, part) for part in prerelease.split('.'))
+    return (int(major), int(minor), int(patch), 0, identifiers)
+
+def is_prerelease_version(key):
+    return key[3] == 0
+
+class ReleaseIndex:
+    """Releases sorted by version, one list per channel, for bisect lookups.
+
+    Drafts and tags that aren't semver are left out. A release counts as a
+    pre-release if GitHub flags it or its tag has a pre-release suffix.
+    """
+    def __init__(self, releases):
+        self.releases = releases
+        self.channels = {'stable': ([], []), 'beta': ([], [])}
+        for key, release in sorted(
+            ((parse_version(r.get('tag_name')), r) for r in releases if not r.get('draft')),
+            key=lambda pair: pair[0] or ()
+        ):
+            if key is None:
+                continue
+            channels = ('beta',) if release.get('prerelease') or is_prerelease_version(key) else ('stable', 'beta')
+            for channel in channels:
+                keys, ordered = self.channels[channel]
+                keys.append(key)
+                ordered.append(release)
+
+    def newer_releases(self, version, channel='stable'):
+        """Releases on channel newer than version, oldest first"""
+        keys, ordered = self.channels[channel]
+        current = parse_version(version) or (0, 0, 0, 0, ())
+        return ordered[bisect_right(keys, current):]
+
+    def newest_update(self, version, channel='stable'):
+        """Newest release on channel newer than version, or None"""
+        newer = self.newer_releases(version, channel)
+        return newer[-1] if newer else None
+
+def iter_json_array(response, chunk_size=16 * 1024):
+    """Yield the items of a JSON array as they arrive, keeping at most about one item in memory"""
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    started = False
+    while True:
+        chunk = response.read(chunk_size)
+        buffer += text_decoder.decode(chunk, final=not chunk)
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != '[':
+                    raise ValueError("expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if not chunk:
+                    raise
+                break  # item continues in the next chunk
+            yield item
+        buffer = buffer[pos:]
+        if not chunk:
+            raise ValueError("JSON array ended early")
+
+def get_next_page_url(link_header):
+    """The rel="next" URL from a GitHub Link header, or None"""
+    for part in link_header.split(','):
+        match = re.match(r'\s*<([^>]+)>\s*;\s*rel="next"', part)
+        if match:
+            return match.group(1)
+    return None
+
+class UpdateService:
+    """Fetch release metadata with an on-disk cache, conditional requests and backoff.
+
+    Cached metadata is reused for ttl seconds. After that the request carries
+    If-None-Match/If-Modified-Since, so an unchanged release costs a 304.
+    Failures back off exponentially with jitter, and GitHub's rate-limit
+    headers push the next attempt past X-RateLimit-Reset when the quota is
+    used up. All state lives in cache_path so it survives restarts.
+    """
+    def __init__(self, api_url, cache_path, transport=None, clock=time.time, ttl=UPDATE_CACHE_TTL):
+        self.api_url = api_url
+        self.cache_path = cache_path
+        self.transport = transport or UrllibTransport()
+        self.clock = clock
+        self.ttl = ttl
+        self.lock = Lock()
+        self.cache = self.load_cache()
+        self.index = None
+
+    def load_cache(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if isinstance(cache, dict):
+                return cache
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def save_cache(self):
+        try:
+            write_json_atomic(self.cache_path, self.cache)
+        except OSError as e:
+            updater_logger.warning("Could not save update cache: %s", e)
+
+    def record_failure(self, reason):
+        failures = self.cache.get('failures', 0) + 1
+        delay = min(UPDATE_BACKOFF_MAX, UPDATE_BACKOFF_BASE * 2 ** (failures - 1))
+        # Full jitter keeps many machines from retrying in lockstep
+        delay = random.uniform(delay / 2, delay)
+        self.cache['failures'] = failures
+        self.cache['next_attempt'] = self.clock() + delay
+        self.save_cache()
+        updater_logger.info("Update check failed (%s); next attempt in %.0f seconds", reason, delay)
+
+    def apply_rate_limit(self, headers):
+        """Hold off until the rate-limit window resets if the quota is used up"""
+        if headers.get('x-ratelimit-remaining') == '0':
+            try:
+                reset_at = float(headers.get('x-ratelimit-reset', 0))
+            except ValueError:
+                reset_at = 0
+            self.cache['next_attempt'] = max(self.cache.get('next_attempt', 0), reset_at)
+            updater_logger.warning("GitHub rate limit reached; waiting until %s",
+                                   datetime.fromtimestamp(reset_at).isoformat(timespec='seconds') if reset_at else "later")
+
+    def fetch(self, url, cache_key, force=False, parse=None):
+        """Return the data at url, using the cache entry cache_key when possible.
+
+        parse(headers, response) turns a 200 response into the data to cache;
+        by default the body is decoded as JSON.
+        """
+        with self.lock:
+            now = self.clock()
+            entry = self.cache.get(cache_key) or {}
+            if not force and entry.get('data') is not None and now - entry.get('fetched_at', 0) < self.ttl:
+                return entry['data']
+            if now < self.cache.get('next_attempt', 0):
+                if entry.get('data') is not None:
+                    return entry['data']
+                raise UpdateCheckError("backing off after earlier failures")
+            
+            headers = {'User-Agent': 'EyeCare-App', 'Accept': 'application/vnd.github+json'}
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+            try:
+                status, response_headers, response = self.transport.open(url, headers)
+                try:
+                    if status == 200:
+                        data = parse(response_headers, response) if parse else json.load(response)
+                finally:
+                    response.close()
+            except OSError as e:  # URLError is an OSError
+                self.record_failure(e)
+                raise UpdateCheckError(f"network error: {e}") from e
+            except (ValueError, AttributeError, KeyError) as e:
+                self.record_failure("invalid JSON")
+                raise UpdateCheckError("invalid JSON in response") from e
+            
+            if status == 304 and entry.get('data') is not None:
+                updater_logger.info("Release metadata not modified")
+            elif status == 200:
+                entry = {
+                    'data': data,
+                    'etag': response_headers.get('etag'),
+                    'last_modified': response_headers.get('last-modified'),
+                }
+            else:
+                self.record_failure(f"HTTP {status}")
+                self.apply_rate_limit(response_headers)
+                self.save_cache()
+                raise UpdateCheckError(f"HTTP {status}")
+            
+            entry['fetched_at'] = now
+            self.cache[cache_key] = entry
+            self.cache['failures'] = 0
+            self.cache['next_attempt'] = 0
+            self.apply_rate_limit(response_headers)
+            self.save_cache()
+            return entry['data']
+
+    def read_release_pages(self, headers, response):
+        """Summaries of every release, streamed page by page without buffering whole pages"""
+        releases = []
+        for page in range(UPDATE_MAX_PAGES):
+            if page:
+                # The first page's response belongs to fetch(); later ones are ours to close
+                status, headers, response = self.transport.open(next_url, {'User-Agent': 'EyeCare-App', 'Accept': 'application/vnd.github+json'})
+            try:
+                if page and status != 200:
+                    raise OSError(f"HTTP {status} fetching {next_url}")
+                releases.extend(summarize_release(data) for data in iter_json_array(response))
+            finally:
+                if page:
+                    response.close()
+            next_url = get_next_page_url(headers.get('link', ''))
+            if next_url is None:
+                break
+        return releases
+
+    def get_release_index(self, force=False):
+        """ReleaseIndex over all published releases; force skips the TTL (the request is still conditional)"""
+        url = f"{self.api_url}?per_page={UPDATE_PAGE_SIZE}"
+        releases = self.fetch(url, 'releases', force, parse=self.read_release_pages)
+        if self.index is None or self.index.releases is not releases:
+            self.index = ReleaseIndex(releases)
+        return self.index
+
+# Staged updates
+UPDATE_CHUNK_SIZE = 64 * 1024
+
+def select_release_asset(release):
+    """The release asset that replaces the running executable, or None"""
+    extension = os.path.splitext(sys.executable)[1].lower()
+    candidates = [
+        asset for asset in release.get('assets', [])
+        if asset.get('url') and not asset['name'].lower().endswith('.sha256')
+        and os.path.splitext(asset['name'])[1].lower() == extension
+    ]
+    candidates.sort(key=lambda asset: 'eyecare' not in asset['name'].lower())
+    return candidates[0] if candidates else None
+
+def get_asset_sha256(release, asset, transport):
+    """Published SHA-256 of asset: GitHub's digest field, else a matching .sha256 asset"""
+    digest = asset.get('digest') or ''
+    if digest.startswith('sha256:'):
+        return digest.split(':', 1)[1].lower()
+    for other in release.get('assets', []):
+        if other['name'].lower() == asset['name'].lower() + '.sha256':
+            status, _, body = transport.get(other['url'], {'User-Agent': 'EyeCare-App'})
+            if status == 200:
+                fields = body.decode('utf-8', 'replace').split()
+                if fields and len(fields[0]) == 64:
+                    return fields[0].lower()
+    return None
+
+def lower_thread_priority():
+    """Run the calling thread at background priority so downloads don't compete with the UI"""
+    try:
+        if sys.platform == 'win32':
+            THREAD_MODE_BACKGROUND_BEGIN = 0x00010000  # lowers CPU and I/O priority
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+        elif hasattr(os, 'setpriority'):
+            # Linux applies nice values per thread
+            os.setpriority(os.PRIO_PROCESS, get_native_id(), 10)
+    except (OSError, AttributeError) as e:
+        updater_logger.debug("Could not lower download priority: %s", e)
+
+def download_release_asset(url, dest, expected_sha256, transport, stop_event=None, chunk_size=UPDATE_CHUNK_SIZE):
+    """Stream url into dest, resuming from dest + '.part' with a Range request.
+
+    The SHA-256 is computed while the bytes are written (an existing partial
+    file is hashed once before resuming), so there is no second pass over the
+    download. dest only appears once the checksum matches. Returns False if
+    stop_event interrupted the transfer; the partial file is kept for next time.
+    """
+    partial = dest + '.part'
+    hasher = hashlib.sha256()
+    offset = 0
+    if os.path.exists(partial):
+        with open(partial, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                hasher.update(chunk)
+                offset += len(chunk)
+    
+    headers = {'User-Agent': 'EyeCare-App', 'Accept': 'application/octet-stream'}
+    if offset:
+        headers['Range'] = f"bytes={offset}-"
+    status, response_headers, response = transport.open(url, headers)
+    try:
+        if status == 416 and offset:
+            # The partial file is already complete
+            pass
+        elif status == 206 and response_headers.get('content-range', '').startswith(f"bytes {offset}-"):
+            updater_logger.info("Resuming download at %d bytes", offset)
+        elif status == 200:
+            if offset:
+                updater_logger.info("Server ignored the range request; downloading from the start")
+            hasher = hashlib.sha256()
+            offset = 0
+        else:
+            raise UpdateCheckError(f"HTTP {status} while downloading")
+        
+        if status != 416:
+            with open(partial, 'ab' if offset else 'wb') as f:
+                for chunk in iter(lambda: response.read(chunk_size), b''):
+                    f.write(chunk)
+                    hasher.update(chunk)
+                    if stop_event is not None and stop_event.is_set():
+                        return False
+                f.flush()
+                os.fsync(f.fileno())
+    finally:
+        response.close()
+    
+    if hasher.hexdigest() != expected_sha256:
+        os.remove(partial)
+        raise UpdateCheckError("checksum mismatch, download discarded")
+    os.replace(partial, dest)
+    return True
+
+# Delta patches: an rsync-style list of "copy this block of the old file" and
+# "insert these bytes" operations, LZMA-compressed behind a small header that
+# pins the SHA-256 of both the old and the new executable
+DELTA_MAGIC = b'ECDELTA1'
+DELTA_HEADER = struct.Struct('<8sI32s32sQ')  # magic, block size, old sha256, new sha256, new length
+DELTA_BLOCK_SIZE = 4096
+
+def delta_block_hash(block):
+    return hashlib.blake2b(block, digest_size=16).digest()
+
+def make_delta(old, new, block_size=DELTA_BLOCK_SIZE):
+    """Build a patch that turns the bytes old into the bytes new.
+
+    Blocks of old are indexed by a strong hash and by a rolling weak sum.
+    While new lines up with old, each block is matched with one lookup; after
+    an edit the weak sum is rolled byte by byte until old and new realign, so
+    inserted or removed bytes only cost their own length in the patch.
+    """
+    size = block_size
+    strong_index = {}
+    weak_index = set()
+    for offset in range(0, len(old) - size + 1, size):
+        block = old[offset:offset + size]
+        strong_index.setdefault(delta_block_hash(block), offset)
+        weak_index.add((sum(block), sum(itertools.accumulate(block))))
+    
+    ops = []
+    def copy(offset, length):
+        if ops and ops[-1][0] == 'C' and ops[-1][1] + ops[-1][2] == offset:
+            ops[-1] = ('C', ops[-1][1], ops[-1][2] + length)
+        else:
+            ops.append(('C', offset, length))
+    
+    i = literal_start = 0
+    end = len(new) - size
+    while i <= end:
+        offset = strong_index.get(delta_block_hash(new[i:i + size]))
+        if offset is None:
+            # Out of step with old: roll the weak sum forward until a block matches again
+            window = new[i:i + size]
+            a, b = sum(window), sum(itertools.accumulate(window))
+            while offset is None and i < end:
+                out_byte, in_byte = new[i], new[i + size]
+                a += in_byte - out_byte
+                b += a - size * out_byte
+                i += 1
+                if (a, b) in weak_index:
+                    offset = strong_index.get(delta_block_hash(new[i:i + size]))
+            if offset is None:
+                break
+        if literal_start < i:
+            ops.append(('L', new[literal_start:i]))
+        copy(offset, size)
+        i += size
+        literal_start = i
+    if literal_start < len(new):
+        ops.append(('L', new[literal_start:]))
+    
+    body = bytearray()
+    for op in ops:
+        if op[0] == 'C':
+            body += b'C' + struct.pack('<QI', op[1], op[2])
+        else:
+            body += b'L' + struct.pack('<I', len(op[1])) + op[1]
+    header = DELTA_HEADER.pack(DELTA_MAGIC, size, hashlib.sha256(old).digest(), hashlib.sha256(new).digest(), len(new))
+    return header + lzma.compress(bytes(body))
+
+def apply_delta(old_path, patch, dest):
+    """Rebuild the new executable from old_path and patch into dest.
+
+    Raises ValueError if the patch is malformed, was made against a
+    different old file, or doesn't reproduce the recorded output hash.
+    Returns the SHA-256 hex digest of the output.
+    """
+    try:
+        magic, _, old_sha256, new_sha256, new_length = DELTA_HEADER.unpack_from(patch)
+        body = lzma.decompress(patch[DELTA_HEADER.size:])
+    except (struct.error, lzma.LZMAError) as e:
+        raise ValueError(f"corrupt delta patch: {e}") from e
+    if magic != DELTA_MAGIC:
+        raise ValueError("not a delta patch")
+    with open(old_path, 'rb') as f:
+        old = f.read()
+    if hashlib.sha256(old).digest() != old_sha256:
+        raise ValueError("delta patch was made for a different version")
+    
+    partial = dest + '.part'
+    hasher = hashlib.sha256()
+    written = 0
+    pos = 0
+    try:
+        with open(partial, 'wb') as f:
+            while pos < len(body):
+                kind = body[pos:pos + 1]
+                if kind == b'C':
+                    offset, length = struct.unpack_from('<QI', body, pos + 1)
+                    pos += 13
+                    chunk = old[offset:offset + length]
+                    if len(chunk) != length:
+                        raise ValueError("delta patch copies past the end of the old file")
+                elif kind == b'L':
+                    (length,) = struct.unpack_from('<I', body, pos + 1)
+                    chunk = body[pos + 5:pos + 5 + length]
+                    pos += 5 + length
+                else:
+                    raise ValueError("corrupt delta patch: unknown operation")
+                f.write(chunk)
+                hasher.update(chunk)
+                written += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+    except (struct.error, ValueError):
+        os.remove(partial)
+        raise
+    if written != new_length or hasher.digest() != new_sha256:
+        os.remove(partial)
+        raise ValueError("delta patch output failed verification")
+    os.replace(partial, dest)
+    return hasher.hexdigest()